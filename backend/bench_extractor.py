@@ -0,0 +1,78 @@
+import random
+import re
+import string
+import sys
+import time
+from extractor import extract_emails_from_text, BLACKLIST_TERMS
+
+# Benchmark offline do extrator de e-mails em HTMLs de vários MB (páginas SPA grandes).
+# Uso: python bench_extractor.py [repetições]
+
+DOMAIN = "empresa.com.br"
+
+def legacy_extract(text: str, domain: str):
+    """Implementação antiga (antes do extractor.py), mantida só para comparação."""
+    if not text: return set()
+    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    matches = re.findall(email_pattern, text)
+    valid_emails = set()
+    for email in matches:
+        email = email.rstrip('.')
+        if domain in email.lower():
+            if not email.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.css', '.js', '.webp', '.svg', '.woff')):
+                if not any(term in email.lower() for term in BLACKLIST_TERMS):
+                    valid_emails.add(email.lower())
+    return valid_emails
+
+def build_fixture(size_mb: float, seed: int = 42) -> str:
+    """HTML sintético: markup, bundles JS minificados, blobs base64, assets @2x e alguns e-mails reais."""
+    rnd = random.Random(seed)
+    alnum = string.ascii_letters + string.digits
+    chunks = ["<html><head><title>Empresa | Home</title></head><body>"]
+    size = 0
+    target = int(size_mb * 1024 * 1024)
+    while size < target:
+        kind = rnd.random()
+        if kind < 0.35:
+            chunk = "<div class=\"card\"><p>" + " ".join(rnd.choice(["contato", "equipe", "sobre", "produtos", "clientes"]) for _ in range(40)) + "</p></div>"
+        elif kind < 0.6:
+            chunk = "<script>var a=" + "".join(rnd.choice(alnum + "._-") for _ in range(2000)) + ";</script>"
+        elif kind < 0.8:
+            chunk = "<img src=\"data:image/png;base64," + "".join(rnd.choice(alnum + "+/") for _ in range(4000)) + "\">"
+        elif kind < 0.95:
+            chunk = "<img srcset=\"logo@2x.png 2x, banner@3x.webp 3x\">"
+        else:
+            user = "".join(rnd.choice(string.ascii_lowercase) for _ in range(8))
+            chunk = f"<a href=\"mailto:{user}@{DOMAIN}\">{user}@{DOMAIN}</a> suporte@google.com"
+        chunks.append(chunk)
+        size += len(chunk)
+    chunks.append("</body></html>")
+    return "".join(chunks)
+
+def best_of(func, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg, DOMAIN)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{'fixture':>8} | {'legado':>10} | {'str':>10} | {'bytes':>10} | {'ganho':>6}")
+    for size_mb in (1, 4, 8):
+        html = build_fixture(size_mb)
+        raw = html.encode()
+
+        found_new = extract_emails_from_text(html, DOMAIN)
+        found_bytes = extract_emails_from_text(memoryview(raw), DOMAIN)
+        assert found_new == found_bytes, "str e bytes devem dar o mesmo resultado"
+        assert found_new <= legacy_extract(html, DOMAIN), "novo extrator não pode inventar e-mails"
+
+        t_legacy = best_of(legacy_extract, html, repeat)
+        t_new = best_of(extract_emails_from_text, html, repeat)
+        t_bytes = best_of(extract_emails_from_text, memoryview(raw), repeat)
+        print(f"{size_mb:>6}MB | {t_legacy*1000:>8.1f}ms | {t_new*1000:>8.1f}ms | {t_bytes*1000:>8.1f}ms | {t_legacy/t_new:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import hunter
+from hunter import hunt_emails_on_web
+from replay import RecordingPool, ReplayPool, RECORDINGS_DIR, load_archive
+
+# Force Windows event loop policy
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+# Benchmark offline do hunter a partir de gravações.
+#   Gravar (usa a rede):   python bench_hunter.py record opentreinamentos.com.br gtap.com.br
+#   Replay (100% offline): python bench_hunter.py replay --latency 80
+# Sem domínios, o replay roda todo o corpus em recordings/.
+# A Fase 1 roda sempre em modo "browser" para que todo o tráfego passe pelo Playwright.
+
+PHASES = ["site", "bing", "google"]
+
+
+async def timed_hunt(domain: str, pool) -> dict:
+    marks = {}
+    start = time.perf_counter()
+
+    def on_phase(phase: str):
+        marks[phase] = time.perf_counter()
+
+    leads = await hunt_emails_on_web(domain, pool=pool, fetch_mode="browser", on_phase=on_phase)
+    end = marks.get("done", time.perf_counter())
+
+    # Duração de cada fase = do início dela até o início da próxima que aconteceu
+    timings = {}
+    order = [p for p in PHASES if p in marks] + ["done"]
+    for current, following in zip(order, order[1:]):
+        timings[current] = marks.get(following, end) - marks[current]
+    counts = {p: len([l for l in leads if l.get("phase") == p]) for p in PHASES}
+    return {"domain": domain, "timings": timings, "counts": counts, "total": end - start, "leads": len(leads)}
+
+
+async def record(domains, directory: str):
+    for domain in domains:
+        pool = RecordingPool(domain, directory=directory, max_contexts=1)
+        await pool.start()
+        try:
+            result = await timed_hunt(domain, pool)
+        finally:
+            await pool.stop()
+        path = pool.save()
+        print(f"💾 {domain}: {len(pool.entries)} respostas gravadas em {path} ({result['leads']} leads)")
+
+
+async def replay(domains, directory: str, latency_ms: float, settle: float):
+    hunter.SERP_SETTLE_DELAY = settle
+    results = []
+    for domain in domains:
+        pool = ReplayPool(load_archive(domain, directory), latency_ms=latency_ms, max_contexts=1)
+        await pool.start()
+        try:
+            results.append(await timed_hunt(domain, pool))
+        finally:
+            await pool.stop()
+        print(f"   ↳ {domain}: {pool.stats['replayed']} respostas servidas, {pool.stats['missing']} fora do arquivo")
+
+    print(f"\n{'domínio':<30} | " + " | ".join(f"{p:>8}" for p in PHASES) + f" | {'total':>8} | leads (site/bing/google)")
+    for r in results:
+        cols = " | ".join(f"{r['timings'].get(p, 0):>7.2f}s" for p in PHASES)
+        counts = "/".join(str(r["counts"][p]) for p in PHASES)
+        print(f"{r['domain']:<30} | {cols} | {r['total']:>7.2f}s | {r['leads']} ({counts})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay do hunter para benchmarks offline")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("domains", nargs="*")
+    parser.add_argument("--dir", default=RECORDINGS_DIR, help="pasta das gravações")
+    parser.add_argument("--latency", type=float, default=0, help="latência simulada por requisição no replay (ms)")
+    parser.add_argument("--settle", type=float, default=hunter.SERP_SETTLE_DELAY, help="espera pós-carregamento dos SERPs (s)")
+    args = parser.parse_args()
+
+    domains = args.domains
+    if not domains:
+        if args.mode == "record":
+            parser.error("informe ao menos um domínio para gravar")
+        domains = sorted(f[:-5] for f in os.listdir(args.dir) if f.endswith(".json"))
+
+    if args.mode == "record":
+        asyncio.run(record(domains, args.dir))
+    else:
+        asyncio.run(replay(domains, args.dir, args.latency, args.settle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import verifier
+from smtp_stand_in import BEHAVIORS, DomainProfile, StandInEnvironment, reset_verifier_state
+
+# Force Windows event loop policy
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+# Benchmark offline do verificador contra os dublês locais de SMTP/DNS (smtp_stand_in.py).
+#   python bench_verifier.py                                  # todos os motores, concorrência 1,8,32
+#   python bench_verifier.py --engines batch --emails 2000 --concurrency 4,16
+#   python bench_verifier.py --delay 0.05 --mix normal,greylist,drop
+# Motores:
+#   realtime - verify_email_realtime (smtplib síncrono) em N threads
+#   async    - verify_email_async, N chamadas simultâneas
+#   batch    - verify_emails_detailed em lotes de --batch-size, N lotes simultâneos
+# Os limites de educação por MX ficam desligados, a não ser com --polite.
+
+ENGINES = ["realtime", "async", "batch"]
+
+
+def build_corpus(n_emails: int, n_domains: int, mix, delay: float, seed: int = 42):
+    """Domínios falsos com os comportamentos de `mix` e uma lista de e-mails (metade existe)."""
+    rng = random.Random(seed)
+    profiles, mailboxes = {}, {}
+    for i in range(n_domains):
+        domain = f"d{i}.{mix[i % len(mix)]}.test"
+        mailboxes[domain] = [f"user{j}" for j in range(max(1, n_emails // n_domains))]
+        existing = set(rng.sample(mailboxes[domain], k=len(mailboxes[domain]) // 2))
+        profiles[domain] = DomainProfile(mix[i % len(mix)], mailboxes=existing, delay=delay)
+    emails = [f"{local}@{domain}" for domain, locals_ in mailboxes.items() for local in locals_]
+    rng.shuffle(emails)
+    return profiles, emails[:n_emails]
+
+
+async def run_realtime(emails, concurrency: int, latencies, statuses):
+    loop = asyncio.get_running_loop()
+
+    def timed(email):
+        start = time.perf_counter()
+        status = verifier.verify_email_realtime(email)
+        return email, status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for email, status, elapsed in await asyncio.gather(*(loop.run_in_executor(pool, timed, e) for e in emails)):
+            latencies.append(elapsed)
+            statuses[email] = status
+
+
+async def run_async(emails, concurrency: int, latencies, statuses):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(email):
+        async with limit:
+            start = time.perf_counter()
+            statuses[email] = await verifier.verify_email_async(email)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(timed(e) for e in emails))
+
+
+async def run_batch(emails, concurrency: int, latencies, statuses, batch_size: int):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(batch):
+        async with limit:
+            start = time.perf_counter()
+
+            async def on_result(email, result):
+                latencies.append(time.perf_counter() - start)
+                statuses[email] = result.status
+
+            await verifier.verify_emails_detailed(batch, on_result=on_result)
+
+    await asyncio.gather(*(timed(emails[i:i + batch_size]) for i in range(0, len(emails), batch_size)))
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def bench(args):
+    mix = args.mix.split(",")
+    profiles, emails = build_corpus(args.emails, args.domains, mix, args.delay)
+    if not args.polite:
+        verifier.MX_MAX_SESSIONS = max(args.concurrency_levels)
+        verifier.MX_RCPT_RATE = 1e9
+        verifier.MX_RCPT_BURST = 10 ** 9
+        verifier.VERIFY_CONCURRENCY = max(verifier.VERIFY_CONCURRENCY, max(args.concurrency_levels))
+
+    print(f"📦 {len(emails)} e-mails em {len(profiles)} domínios ({', '.join(mix)}), latência SMTP {args.delay * 1000:.0f}ms\n")
+    print(f"{'motor':<9} | {'conc':>4} | {'verif/s':>8} | {'p50':>8} | {'p99':>8} | {'conexões':>8} | status")
+    rows = []
+    async with StandInEnvironment(profiles, port=args.port) as env:
+        for engine in args.engine_list:
+            for concurrency in args.concurrency_levels:
+                reset_verifier_state()
+                env.server.stats.update(connections=0, rcpt=0, dropped=0, greylisted=0)
+                env.server._greylisted.clear()
+                latencies, statuses = [], {}
+                start = time.perf_counter()
+                if engine == "realtime":
+                    await run_realtime(emails, concurrency, latencies, statuses)
+                elif engine == "async":
+                    await run_async(emails, concurrency, latencies, statuses)
+                else:
+                    await run_batch(emails, concurrency, latencies, statuses, args.batch_size)
+                elapsed = time.perf_counter() - start
+                counts = Counter(statuses.values())
+                rows.append((engine, concurrency, len(emails) / elapsed))
+                print(f"{engine:<9} | {concurrency:>4} | {len(emails) / elapsed:>8.1f} | "
+                      f"{percentile(latencies, 50) * 1000:>6.1f}ms | {percentile(latencies, 99) * 1000:>6.1f}ms | "
+                      f"{env.server.stats['connections']:>8} | " + " ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+    if len({r[0] for r in rows}) > 1:
+        best = {}
+        for engine, concurrency, rate in rows:
+            best[engine] = max(best.get(engine, 0), rate)
+        base = best.get("realtime") or statistics.mean(best.values())
+        print("\n🏁 Melhor taxa por motor: " + ", ".join(f"{e} {r:.1f}/s ({r / base:.1f}x)" for e, r in best.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do verificador contra SMTP/DNS locais")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="realtime,async,batch")
+    parser.add_argument("--concurrency", default="1,8,32", help="níveis de concorrência, separados por vírgula")
+    parser.add_argument("--emails", type=int, default=300)
+    parser.add_argument("--domains", type=int, default=10)
+    parser.add_argument("--mix", default="normal,accept,reject", help=f"comportamentos: {','.join(BEHAVIORS)}")
+    parser.add_argument("--delay", type=float, default=0.0, help="latência por resposta SMTP (s)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--polite", action="store_true", help="mantém os limites de sessões/RCPT por MX")
+    args = parser.parse_args()
+
+    args.engine_list = [e for e in args.engines.split(",") if e]
+    unknown = set(args.engine_list) - set(ENGINES)
+    if unknown:
+        parser.error(f"motores desconhecidos: {', '.join(sorted(unknown))}")
+    unknown = set(args.mix.split(",")) - set(BEHAVIORS)
+    if unknown:
+        parser.error(f"comportamentos desconhecidos: {', '.join(sorted(unknown))}")
+    args.concurrency_levels = [int(c) for c in args.concurrency.split(",") if c]
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
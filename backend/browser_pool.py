@@ -0,0 +1,225 @@
+from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import time
+from typing import Optional, Set
+
+try:
+    import psutil  # Opcional: só é usado para medir o RSS do Chromium
+except ImportError:
+    psutil = None
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+DEFAULT_VIEWPORT = {"width": 1280, "height": 800}
+
+# Limites padrão (podem ser sobrescritos por variável de ambiente)
+POOL_MAX_CONTEXTS = int(os.getenv("POOL_MAX_CONTEXTS", "4"))
+POOL_MAX_PAGES_PER_BROWSER = int(os.getenv("POOL_MAX_PAGES_PER_BROWSER", "300"))
+POOL_MAX_RSS_MB = int(os.getenv("POOL_MAX_RSS_MB", "1500"))
+POOL_HEALTH_INTERVAL = float(os.getenv("POOL_HEALTH_INTERVAL", "30"))
+# Tempo mínimo de vida antes de reciclar por RSS (evita relançar em cascata logo depois de uma troca)
+POOL_MIN_RECYCLE_INTERVAL = float(os.getenv("POOL_MIN_RECYCLE_INTERVAL", "60"))
+
+
+class _BrowserSlot:
+    """Um processo Chromium e seus contadores de uso."""
+    def __init__(self, browser, root_pids: Set[int]):
+        self.browser = browser
+        self.root_pids = root_pids # Processo principal deste Chromium (os renderers são filhos dele)
+        self.launched_at = time.monotonic()
+        self.pages_served = 0
+        self.active_contexts = 0
+        self.retiring = False
+
+    def is_healthy(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Pool de Chromium de vida longa, ligado ao ciclo de vida do FastAPI.
+    - Entrega um BrowserContext isolado por varredura (cookies/cache não vazam).
+    - Limita o número de contextos simultâneos.
+    - Recicla o browser depois de N páginas ou quando o RSS passa do limite.
+    - Health check substitui browsers que crasharam.
+    """
+    def __init__(self, max_contexts: int = POOL_MAX_CONTEXTS,
+                 max_pages_per_browser: int = POOL_MAX_PAGES_PER_BROWSER,
+                 max_rss_mb: int = POOL_MAX_RSS_MB,
+                 health_interval: float = POOL_HEALTH_INTERVAL,
+                 headless: bool = True):
+        self.max_contexts = max_contexts
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.headless = headless
+
+        self._playwright = None
+        self._slot: Optional[_BrowserSlot] = None
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._health_task: Optional[asyncio.Task] = None
+        self.stats = {"launches": 0, "recycles": 0, "crashes": 0, "contexts_served": 0}
+
+    async def start(self):
+        if self._playwright is not None:
+            return
+        self._playwright = await async_playwright().start()
+        async with self._lock:
+            self._slot = await self._launch()
+        if self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+        print(f"🌐 [POOL] Browser pool pronto (máx. {self.max_contexts} contextos simultâneos)")
+
+    async def stop(self):
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        async with self._lock:
+            if self._slot:
+                await self._close_browser(self._slot)
+                self._slot = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        print("🌐 [POOL] Browser pool encerrado.")
+
+    async def _launch(self) -> _BrowserSlot:
+        # Sempre chamado com o lock: o Chromium raiz que aparecer entre as duas leituras é deste browser
+        before = self._chromium_roots()
+        browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=["--disable-blink-features=AutomationControlled"]
+        )
+        self.stats["launches"] += 1
+        return _BrowserSlot(browser, self._chromium_roots() - before)
+
+    async def _close_browser(self, slot: _BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    def _should_recycle(self, slot: _BrowserSlot) -> bool:
+        if slot.pages_served >= self.max_pages_per_browser:
+            return True
+        if time.monotonic() - slot.launched_at < POOL_MIN_RECYCLE_INTERVAL:
+            return False
+        # Só o RSS deste browser: um aposentado ainda drenando contextos não conta
+        rss = self.chromium_rss_mb(slot.root_pids)
+        return rss is not None and rss >= self.max_rss_mb
+
+    async def _current_slot(self) -> _BrowserSlot:
+        """Retorna o browser ativo, trocando-o se estiver morto ou precisar de reciclagem."""
+        async with self._lock:
+            slot = self._slot
+            if slot is None or not slot.is_healthy():
+                if slot is not None:
+                    self.stats["crashes"] += 1
+                    print("   ⚠️ [POOL] Browser caiu, subindo um novo...")
+                self._slot = await self._launch()
+            elif self._should_recycle(slot):
+                print(f"   ♻️ [POOL] Reciclando browser ({slot.pages_served} páginas servidas)")
+                self.stats["recycles"] += 1
+                slot.retiring = True
+                if slot.active_contexts == 0:
+                    await self._close_browser(slot)
+                self._slot = await self._launch()
+            return self._slot
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        """Empresta um BrowserContext isolado. Fecha o contexto ao sair."""
+        if self._playwright is None:
+            await self.start()
+
+        context_kwargs.setdefault("user_agent", DEFAULT_USER_AGENT)
+        context_kwargs.setdefault("viewport", DEFAULT_VIEWPORT)
+
+        async with self._semaphore:
+            slot = await self._current_slot()
+            slot.active_contexts += 1
+            self.stats["contexts_served"] += 1
+            context = None
+            try:
+                context = await slot.browser.new_context(**context_kwargs)
+
+                def _count_page(_page):
+                    slot.pages_served += 1
+                context.on("page", _count_page)
+
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                slot.active_contexts -= 1
+                # Browser aposentado é fechado quando o último contexto dele sai
+                if slot.retiring and slot.active_contexts == 0:
+                    await self._close_browser(slot)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self._current_slot()
+            except Exception as e:
+                print(f"   ⚠️ [POOL] Health check falhou: {e}")
+
+    @staticmethod
+    def _chromium_roots() -> Set[int]:
+        """PIDs dos processos Chromium principais (filhos deste processo cujo pai não é Chromium)."""
+        if psutil is None:
+            return set()
+        roots = set()
+        try:
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    if "chrom" in child.name().lower():
+                        parent = child.parent()
+                        if parent is None or "chrom" not in parent.name().lower():
+                            roots.add(child.pid)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except Exception:
+            pass
+        return roots
+
+    @staticmethod
+    def chromium_rss_mb(root_pids: Optional[Set[int]] = None) -> Optional[float]:
+        """
+        Soma o RSS de uma árvore de processos Chromium (requer psutil).
+        Sem `root_pids`, soma todos os Chromium filhos deste processo.
+        """
+        if psutil is None:
+            return None
+        try:
+            if root_pids is None:
+                procs = [c for c in psutil.Process().children(recursive=True) if "chrom" in c.name().lower()]
+            else:
+                if not root_pids:
+                    return None # Não deu para identificar o processo deste browser
+                procs = []
+                for pid in root_pids:
+                    try:
+                        root = psutil.Process(pid)
+                        procs.append(root)
+                        procs.extend(root.children(recursive=True))
+                    except psutil.NoSuchProcess:
+                        continue
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import re
+from typing import AsyncIterator, Tuple
+
+from database import SessionLocal
+from verification_cache import load_fresh, store_results
+from verifier import VerificationResult, verify_emails_detailed
+
+# Verificação em massa (listas importadas / CRM) com memória limitada:
+# a entrada é lida aos pedaços, no máximo BULK_MAX_INFLIGHT_CHUNKS lotes rodam ao mesmo tempo
+# e a fila de saída é limitada, então um cliente lento segura a verificação (backpressure).
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "200"))
+BULK_MAX_INFLIGHT_CHUNKS = int(os.getenv("BULK_MAX_INFLIGHT_CHUNKS", "4"))
+BULK_QUEUE_SIZE = int(os.getenv("BULK_QUEUE_SIZE", "500"))
+UPLOAD_READ_SIZE = 64 * 1024
+BULK_CANCEL_TIMEOUT = 10.0 # Cliente desconectou: tempo máximo esperando os lotes fecharem as sessões SMTP
+
+_EMAIL_TOKEN_RE = re.compile(r"[^\s,;\"'<>]+@[^\s,;\"'<>]+")
+
+
+async def emails_from_upload(upload) -> AsyncIterator[str]:
+    """Lê um arquivo enviado (txt/csv) aos pedaços, devolvendo cada e-mail encontrado nas linhas."""
+    leftover = b""
+    while True:
+        chunk = await upload.read(UPLOAD_READ_SIZE)
+        if not chunk:
+            break
+        lines = (leftover + chunk).split(b"\n")
+        leftover = lines.pop()
+        for line in lines:
+            for email in _EMAIL_TOKEN_RE.findall(line.decode("utf-8", errors="ignore")):
+                yield email
+    for email in _EMAIL_TOKEN_RE.findall(leftover.decode("utf-8", errors="ignore")):
+        yield email
+
+
+async def emails_from_list(emails) -> AsyncIterator[str]:
+    for email in emails:
+        if isinstance(email, str) and email.strip():
+            yield email
+
+
+async def verify_stream(emails: AsyncIterator[str], refresh: bool = False) -> AsyncIterator[Tuple[str, VerificationResult]]:
+    """
+    Motor da verificação em massa: agrupa a entrada em lotes (cada lote usa o cache
+    compartilhado e sessões SMTP por MX) e entrega cada resultado assim que fica pronto.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=BULK_QUEUE_SIZE)
+    slots = asyncio.Semaphore(BULK_MAX_INFLIGHT_CHUNKS)
+    done = object()
+
+    async def run_chunk(chunk):
+        reported = set()
+
+        async def report(email: str, result: VerificationResult):
+            reported.add(email)
+            await queue.put((email, result))
+
+        db = SessionLocal()
+        try:
+            cached = {} if refresh else load_fresh(db, chunk)
+            for email, result in cached.items():
+                await report(email, result)
+
+            fresh = {}
+            async def on_result(email: str, result: VerificationResult):
+                fresh[email] = result
+                await report(email, result)
+
+            missing = [email for email in chunk if email not in cached]
+            if missing:
+                await verify_emails_detailed(missing, on_result=on_result)
+            store_results(db, fresh)
+        except Exception as e:
+            print(f"   ⚠️ [BULK] Erro no lote: {e}")
+            for email in chunk:
+                if email not in reported:
+                    await report(email, VerificationResult("risky", message=str(e)))
+        finally:
+            db.close()
+            slots.release()
+
+    async def produce():
+        tasks = set()
+        chunk = {}
+        cancelled = False
+        try:
+            async for email in emails:
+                chunk[email.strip()] = None
+                if len(chunk) >= BULK_CHUNK_SIZE:
+                    await slots.acquire()
+                    tasks.add(asyncio.create_task(run_chunk(list(chunk))))
+                    chunk = {}
+            if chunk:
+                await slots.acquire()
+                tasks.add(asyncio.create_task(run_chunk(list(chunk))))
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Cancelado = ninguém mais lê a fila (e ela pode estar cheia): não há a quem avisar
+            if not cancelled:
+                await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await producer
+    finally:
+        # Cliente desconectou no meio: para tudo
+        if not producer.done():
+            producer.cancel()
+            await asyncio.wait([producer], timeout=BULK_CANCEL_TIMEOUT)
+
+
+async def ndjson_results(emails: AsyncIterator[str], refresh: bool = False) -> AsyncIterator[bytes]:
+    async for email, result in verify_stream(emails, refresh=refresh):
+        yield (json.dumps({
+            "email": email,
+            "status": result.status,
+            "smtp_code": result.code,
+            "catch_all": result.catch_all,
+            "mx_host": result.mx_host,
+        }) + "\n").encode("utf-8")
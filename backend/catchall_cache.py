@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# O probe de catch-all roda uma vez por domínio por dia, não uma vez por e-mail
+CATCHALL_TTL = int(os.getenv("CATCHALL_TTL", str(24 * 3600)))
+
+
+class CatchAllCache:
+    """
+    Veredito de catch-all por domínio, compartilhado entre varreduras e usuários.
+    `resolve()` só chama o probe quando não há veredito válido (ou com force_refresh),
+    e verificações simultâneas do mesmo domínio esperam o mesmo probe (single-flight).
+    """
+    def __init__(self, ttl: int = CATCHALL_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, bool]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "coalesced": 0, "probes": 0, "inconclusive": 0}
+
+    def get(self, domain: str) -> Optional[bool]:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        expires_at, is_catch_all = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[domain]
+            return None
+        return is_catch_all
+
+    def set(self, domain: str, is_catch_all: bool):
+        self._entries[domain] = (time.monotonic() + self.ttl, is_catch_all)
+
+    def invalidate(self, domain: str):
+        self._entries.pop(domain, None)
+
+    async def resolve(self, domain: str, probe: Callable[[], Awaitable[int]], force_refresh: bool = False) -> Optional[bool]:
+        """
+        `probe()` deve fazer o RCPT do endereço falso e devolver o código SMTP.
+        250 = catch-all, 5xx = não é. None = inconclusivo, não cacheado: o probe recebeu outro
+        código (4xx de greylisting/throttle) ou o probe de outra verificação, que esta esperava, foi cancelado.
+        """
+        domain = domain.lower()
+        if not force_refresh:
+            cached = self.get(domain)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+            inflight = self._inflight.get(domain)
+            if inflight is not None:
+                self.stats["coalesced"] += 1
+                try:
+                    return await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    task = asyncio.current_task()
+                    cancelling = task.cancelling() if hasattr(task, "cancelling") else 0 # Python 3.11+
+                    if cancelling or not inflight.cancelled():
+                        raise # Quem foi cancelado foi esta verificação, não o probe compartilhado
+                    # O dono do probe foi cancelado: não derruba o lote de quem só estava esperando
+                    self.stats["inconclusive"] += 1
+                    return None
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[domain] = future
+        try:
+            self.stats["probes"] += 1
+            code = await probe()
+            if code == 250 or code >= 500:
+                is_catch_all = (code == 250)
+                self.set(domain, is_catch_all)
+            else:
+                # 4xx (greylisting/throttle): não dá para afirmar que o domínio não é catch-all
+                is_catch_all = None
+                self.stats["inconclusive"] += 1
+            future.set_result(is_catch_all)
+            return is_catch_all
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Evita "exception was never retrieved" se ninguém mais esperava
+            raise
+        finally:
+            if self._inflight.get(domain) is future:
+                del self._inflight[domain]
+
+    def clear(self):
+        self._entries.clear()
+
+    def hit_rate(self) -> float:
+        hits = self.stats["hits"] + self.stats["coalesced"]
+        total = hits + self.stats["probes"]
+        return hits / total if total else 0.0
+
+
+# Instância única do processo (todas as varreduras e usuários compartilham)
+catchall_cache = CatchAllCache()
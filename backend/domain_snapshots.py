@@ -0,0 +1,50 @@
+import datetime
+import json
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+import models
+
+# Quanto tempo a caçada de um domínio vale para os outros usuários antes de caçar de novo
+DOMAIN_SNAPSHOT_TTL_HOURS = float(os.getenv("DOMAIN_SNAPSHOT_TTL_HOURS", "24"))
+SNAPSHOT_FIELDS = ("name", "email", "linkedin", "role", "phase")
+
+stats = {"hits": 0, "misses": 0, "writes": 0}
+
+
+def load_snapshot(db: Session, domain: str, ttl_hours: float = DOMAIN_SNAPSHOT_TTL_HOURS) -> Optional[List[Dict]]:
+    """Leads da última caçada do domínio, se ainda estiver dentro do TTL. None = precisa caçar."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=ttl_hours)
+    row = db.query(models.DomainSnapshot).filter(
+        models.DomainSnapshot.domain == domain,
+        models.DomainSnapshot.hunted_at >= cutoff
+    ).first()
+    if row is None:
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return json.loads(row.leads_json)
+
+
+def save_snapshot(db: Session, domain: str, leads: List[Dict]):
+    """Grava/substitui o snapshot do domínio (INSERT ... ON DUPLICATE KEY UPDATE)."""
+    raw = [{field: lead.get(field) for field in SNAPSHOT_FIELDS} for lead in leads]
+    stmt = mysql_insert(models.DomainSnapshot).values(
+        domain=domain, leads_json=json.dumps(raw, ensure_ascii=False), lead_count=len(raw),
+        hunted_at=datetime.datetime.utcnow()
+    )
+    stmt = stmt.on_duplicate_key_update(
+        leads_json=stmt.inserted.leads_json,
+        lead_count=stmt.inserted.lead_count,
+        hunted_at=stmt.inserted.hunted_at,
+    )
+    try:
+        db.execute(stmt)
+        db.commit()
+        stats["writes"] += 1
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao gravar snapshot de {domain}: {e}")
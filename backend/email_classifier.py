@@ -0,0 +1,130 @@
+import re
+from typing import FrozenSet, NamedTuple, Optional
+
+# Classificação offline (sem rede) de e-mails candidatos. Roda antes de DNS/SMTP:
+# descarta o que nunca vai ser um lead e marca o resto (conta de função, webmail gratuito).
+
+MAX_EMAIL_LENGTH = 254
+MAX_LOCAL_LENGTH = 64
+MAX_LABEL_LENGTH = 63
+
+# dot-atom do RFC 5322 (sem aspas nem comentários, que nenhum lead real usa)
+_LOCAL_RE = re.compile(r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*")
+_LABEL_RE = re.compile(r"[a-z0-9](?:[a-z0-9-]*[a-z0-9])?")
+_TLD_RE = re.compile(r"(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})")
+# "contato.rh", "noreply-123", "vendas+site": o primeiro pedaço decide se é conta de função
+_LOCAL_SPLIT_RE = re.compile(r"[.+_-]")
+
+# Contas de função (não são uma pessoa). Comparadas com o local-part inteiro e com o primeiro pedaço.
+ROLE_LOCAL_PARTS: FrozenSet[str] = frozenset({
+    "contato", "contact", "contatos", "faleconosco", "fale", "atendimento", "sac", "ouvidoria",
+    "rh", "recrutamento", "vagas", "curriculos", "curriculo", "jobs", "careers", "hr",
+    "comercial", "vendas", "sales", "orcamento", "orcamentos", "marketing", "imprensa", "press",
+    "financeiro", "cobranca", "faturamento", "billing", "compras", "fiscal", "juridico", "legal",
+    "suporte", "support", "help", "ajuda", "ti", "it", "admin", "administrador", "administrativo",
+    "info", "informacoes", "hello", "ola", "office", "secretaria", "recepcao", "geral", "diretoria",
+    "webmaster", "postmaster", "hostmaster", "abuse", "security", "privacy", "privacidade", "dpo",
+    "newsletter", "news", "parcerias", "partners", "team", "equipe",
+})
+
+# Endereços que não recebem resposta: nunca viram lead
+NO_REPLY_LOCAL_PARTS: FrozenSet[str] = frozenset({
+    "noreply", "no-reply", "no_reply", "naoresponda", "nao-responda", "nao_responda",
+    "donotreply", "do-not-reply", "mailer-daemon", "bounce", "bounces",
+})
+
+# Webmail gratuito: pessoa real, mas não é o e-mail corporativo
+FREE_MAIL_DOMAINS: FrozenSet[str] = frozenset({
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.com.br", "outlook.com", "outlook.com.br",
+    "live.com", "msn.com", "yahoo.com", "yahoo.com.br", "ymail.com", "icloud.com", "me.com", "mac.com",
+    "aol.com", "protonmail.com", "proton.me", "gmx.com", "gmx.net", "zoho.com", "yandex.com", "mail.com",
+    "bol.com.br", "uol.com.br", "terra.com.br", "ig.com.br", "globo.com", "globomail.com", "r7.com",
+    "zipmail.com.br", "oi.com.br", "pop.com.br",
+})
+
+# E-mails descartáveis/temporários (lista curta com os mais comuns; subdomínios também contam)
+DISPOSABLE_DOMAINS: FrozenSet[str] = frozenset({
+    "mailinator.com", "guerrillamail.com", "guerrillamail.net", "sharklasers.com", "10minutemail.com",
+    "10minutemail.net", "tempmail.com", "temp-mail.org", "tempmail.net", "throwawaymail.com",
+    "yopmail.com", "yopmail.net", "getnada.com", "nada.email", "trashmail.com", "dispostable.com",
+    "maildrop.cc", "mailnesia.com", "mintemail.com", "fakeinbox.com", "emailondeck.com",
+    "mohmal.com", "spambox.us", "tempr.email", "discard.email", "mailcatch.com", "moakt.com",
+})
+
+stats = {"checked": 0, "rejected": 0}
+
+
+class Classification(NamedTuple):
+    email: Optional[str]             # Normalizado (domínio em minúsculas, IDN em punycode); None se inválido
+    verdict: str                     # "ok" ou "invalid" (não vale gastar rede)
+    reason: str = ""                 # syntax, disposable, no_reply
+    is_role: bool = False
+    is_free_mail: bool = False
+
+    @property
+    def rejected(self) -> bool:
+        return self.verdict == "invalid"
+
+
+def _domain_or_parent_in(domain: str, index: FrozenSet[str]) -> bool:
+    """Testa o domínio e cada domínio pai ("a.b.mailinator.com" -> "b.mailinator.com" -> ...)."""
+    while True:
+        if domain in index:
+            return True
+        _, dot, domain = domain.partition(".")
+        if not dot or "." not in domain:
+            return False
+
+
+def normalize_domain(domain: str) -> Optional[str]:
+    """Minúsculas, sem ponto final e com IDN convertido para punycode (o que o DNS entende)."""
+    domain = domain.strip().rstrip(".").lower()
+    if not domain:
+        return None
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            return None
+    labels = domain.split(".")
+    if len(labels) < 2 or not _TLD_RE.fullmatch(labels[-1]):
+        return None
+    for label in labels:
+        if len(label) > MAX_LABEL_LENGTH or not _LABEL_RE.fullmatch(label):
+            return None
+    return domain
+
+
+def classify_email(email: str) -> Classification:
+    """Sintaxe estrita + índices em memória. Nenhuma chamada de rede."""
+    stats["checked"] += 1
+    result = _classify(email)
+    if result.rejected:
+        stats["rejected"] += 1
+    return result
+
+
+def _classify(email: str) -> Classification:
+    local, at, domain = email.strip().rpartition("@")
+    local = local.lower()
+    if not at or not local or len(local) > MAX_LOCAL_LENGTH or not _LOCAL_RE.fullmatch(local):
+        return Classification(None, "invalid", "syntax")
+    domain = normalize_domain(domain)
+    if domain is None:
+        return Classification(None, "invalid", "syntax")
+    normalized = f"{local}@{domain}"
+    if len(normalized) > MAX_EMAIL_LENGTH:
+        return Classification(None, "invalid", "syntax")
+
+    if _domain_or_parent_in(domain, DISPOSABLE_DOMAINS):
+        return Classification(normalized, "invalid", "disposable")
+    head = _LOCAL_SPLIT_RE.split(local, 1)[0]
+    if local in NO_REPLY_LOCAL_PARTS or head in NO_REPLY_LOCAL_PARTS or local.startswith(("noreply", "no-reply")):
+        return Classification(normalized, "invalid", "no_reply")
+
+    return Classification(
+        normalized,
+        "ok",
+        is_role=local in ROLE_LOCAL_PARTS or head in ROLE_LOCAL_PARTS,
+        is_free_mail=domain in FREE_MAIL_DOMAINS,
+    )
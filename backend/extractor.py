@@ -0,0 +1,57 @@
+import re
+from typing import Set, Union
+
+BLACKLIST_TERMS = [
+    "na.hora", "nas.horas", "na.semana", "no.mes", "no.ano",
+    "em.portugues", "videos", "pesquisar", "resultados", "modo",
+    "letra", "google", "bing", "yahoo", "duckduckgo", "search",
+    "mapas", "shopping", "imagens", "noticias", "livros", "voos", "financas"
+]
+
+# O lookbehind impede que o motor recomece a casar no MEIO de uma sequência longa de
+# caracteres válidos (base64, hashes, bundles JS), que era O(n²) em páginas SPA grandes.
+_EMAIL_SOURCE = r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+EMAIL_RE = re.compile(_EMAIL_SOURCE)
+EMAIL_RE_BYTES = re.compile(_EMAIL_SOURCE.encode())
+
+# Um único regex com todos os termos = uma passada por e-mail em vez de len(BLACKLIST_TERMS)
+BLACKLIST_RE = re.compile("|".join(re.escape(term) for term in BLACKLIST_TERMS))
+
+TextInput = Union[str, bytes, bytearray, memoryview]
+
+def is_blacklisted(email_lower: str) -> bool:
+    """`email_lower` já deve estar em minúsculas."""
+    return BLACKLIST_RE.search(email_lower) is not None
+
+def _belongs_to_domain(email_lower: str, domain: str) -> bool:
+    host = email_lower.rpartition("@")[2]
+    return host == domain or host.endswith("." + domain)
+
+def extract_emails_from_text(text: TextInput, domain: str) -> Set[str]:
+    """
+    Extrai e-mails do domínio alvo (ou subdomínios) de um texto cru.
+    Aceita str ou bytes/memoryview (HTML direto do socket, sem decodificar a página inteira).
+    """
+    if not text: return set()
+    domain = domain.lower()
+
+    if isinstance(text, str):
+        matches = EMAIL_RE.findall(text)
+    else:
+        if isinstance(text, memoryview):
+            text = text.tobytes() if not text.c_contiguous else text
+        # O padrão é só ASCII, então decodificar cada match é seguro
+        matches = [m.decode("ascii") for m in EMAIL_RE_BYTES.findall(text)]
+
+    valid_emails = set()
+    for email in matches:
+        # Remove ponto final se houver (comum em finais de frase) e normaliza uma única vez
+        email = email.rstrip('.').lower()
+        if email in valid_emails: continue
+
+        # Sufixo de domínio (não substring): "empresa.com.br.fake.io" não passa mais.
+        # Isso também descarta "logo@2x.png" e afins, já que o host precisa terminar no domínio.
+        if not _belongs_to_domain(email, domain): continue
+        if is_blacklisted(email): continue
+        valid_emails.add(email)
+    return valid_emails
@@ -0,0 +1,158 @@
+import httpx
+import re
+import html as html_lib
+from html.parser import HTMLParser
+from typing import List, Literal, Optional, Tuple, get_args
+
+try:
+    import h2  # noqa: F401  (httpx só habilita HTTP/2 se o pacote h2 existir)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from browser_pool import DEFAULT_USER_AGENT
+
+# Modos de recon da Fase 1, escolhidos por varredura:
+#   "auto"    -> HTTP primeiro; Playwright só se a página precisar de JavaScript
+#   "http"    -> nunca abre o browser na Fase 1
+#   "browser" -> sempre renderiza no Chromium (comportamento antigo)
+FetchMode = Literal["auto", "http", "browser"]
+FETCH_MODES = get_args(FetchMode)
+DEFAULT_FETCH_MODE = "auto"
+
+FETCH_TIMEOUT = 10.0
+FETCH_MAX_BYTES = 3 * 1024 * 1024
+
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style|noscript)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+# Raízes vazias típicas de SPA (React/Vue/Angular) que só ganham conteúdo via JS
+_SPA_ROOT_RE = re.compile(r'<(div|app-root)[^>]*id=["\'](root|app|__nuxt|__next)["\'][^>]*>\s*</\1>', re.IGNORECASE)
+_JS_REQUIRED_RE = re.compile(r"(enable|ative|habilite)\s+(o\s+)?javascript", re.IGNORECASE)
+
+
+class _AnchorParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links: List[Tuple[str, str]] = []
+        self._current_href = None
+        self._current_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._flush()
+            self._current_href = dict(attrs).get("href")
+            self._current_text = []
+
+    def handle_data(self, data):
+        if self._current_href is not None:
+            self._current_text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._flush()
+
+    def _flush(self):
+        if self._current_href:
+            self.links.append((self._current_href, " ".join("".join(self._current_text).split())))
+        self._current_href = None
+        self._current_text = []
+
+
+def extract_links_from_html(html: str) -> List[Tuple[str, str]]:
+    """Mesmo formato de hunter.extract_links, mas a partir do HTML estático."""
+    parser = _AnchorParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    return parser.links
+
+
+def extract_title_from_html(html: str) -> Optional[str]:
+    match = _TITLE_RE.search(html)
+    if not match:
+        return None
+    return " ".join(html_lib.unescape(match.group(1)).split()) or None
+
+
+def needs_js_rendering(html: str) -> bool:
+    """
+    Heurística: a página só faz sentido renderizada?
+    - Raiz de SPA vazia (<div id="root"></div>)
+    - Aviso de "habilite o JavaScript"
+    - Quase nenhum texto visível e nenhum link
+    """
+    if not html:
+        return True
+    if _SPA_ROOT_RE.search(html):
+        return True
+    visible_text = _TAG_RE.sub(" ", _SCRIPT_STYLE_RE.sub(" ", html))
+    visible_len = len(" ".join(visible_text.split()))
+    if visible_len < 200 and _JS_REQUIRED_RE.search(html):
+        return True
+    return visible_len < 80 and "<a " not in html.lower()
+
+
+class SiteFetcher:
+    """
+    Cliente HTTP assíncrono da Fase 1 (pool de conexões, HTTP/2, gzip/br).
+    Mesmo ciclo de vida do BrowserPool: criado no startup do app e fechado no shutdown.
+    """
+    def __init__(self, timeout: float = FETCH_TIMEOUT, max_connections: int = 50):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {"requests": 0, "errors": 0}
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=20),
+            headers={
+                "User-Agent": DEFAULT_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+            },
+        )
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> Optional[Tuple[str, str]]:
+        """Baixa uma página HTML. Retorna (url_final, html) ou None se falhar / não for HTML."""
+        if self._client is None:
+            await self.start()
+        self.stats["requests"] += 1
+        try:
+            async with self._client.stream("GET", url) as response:
+                if response.status_code >= 400:
+                    self.stats["errors"] += 1
+                    return None
+                if "html" not in response.headers.get("content-type", "html").lower():
+                    return None
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= FETCH_MAX_BYTES:
+                        break
+                encoding = response.encoding or "utf-8"
+                return str(response.url), bytes(body).decode(encoding, errors="replace")
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+
+    async def fetch_site(self, clean_domain: str) -> Optional[Tuple[str, str]]:
+        """Home do domínio com fallback HTTPS -> HTTP. Retorna (base_url, html) ou None."""
+        result = await self.fetch(f"https://{clean_domain}")
+        if result is None:
+            print(f"   ⚠️ HTTPS falhou, tentando HTTP para {clean_domain}...")
+            result = await self.fetch(f"http://{clean_domain}")
+        return result
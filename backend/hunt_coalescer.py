@@ -0,0 +1,140 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+# Single-flight de caçadas: enquanto um domínio está sendo caçado, quem pedir o mesmo domínio
+# se pendura na caçada em andamento (recebe os leads já achados + os próximos) em vez de abrir
+# outro Chromium e refazer Bing/Google/SMTP. Cada inscrito grava os leads nas próprias linhas.
+# O que vale para todos (snapshot do domínio) é gravado uma vez só, pelo dono da caçada.
+_PHASE_KEY = "__phase__" # Marcador de troca de fase no meio dos leads
+
+
+def normalize_scan_domain(domain: str) -> str:
+    """'https://www.Empresa.com.br/contato' -> 'empresa.com.br' (mesma limpeza do hunter, em minúsculas)."""
+    domain = domain.strip().lower()
+    for prefix in ("http://", "https://"):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    domain = domain.split("/")[0].split("?")[0].split("#")[0].rstrip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+class _Flight:
+    def __init__(self):
+        self.items: List[Dict] = [] # Leads e marcadores de fase, na ordem em que aconteceram
+        self.lead_count = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.phase_errors: List[str] = [] # Fases que falharam ou foram bloqueadas: caçada incompleta
+        self.subscribers = 0
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self):
+        event, self.updated = self.updated, asyncio.Event()
+        event.set()
+
+
+class HuntCoalescer:
+    """
+    `subscribe(domain, on_phase, **hunt_kwargs)` devolve um stream de leads como hunt_emails_stream
+    (e repassa as trocas de fase para `on_phase`, inclusive as que já passaram).
+    A primeira inscrição dispara `hunt_stream(domain, **hunt_kwargs)`; as seguintes, enquanto
+    ela roda, recebem o replay do que já saiu e depois os leads novos. Quando a caçada termina,
+    a próxima inscrição começa uma nova.
+    `on_complete(domínio, leads)` roda uma vez por caçada, só se ela terminou sem erro em nenhuma
+    fase (o hunt_stream avisa via `on_error(fase, mensagem)`).
+    """
+    def __init__(self, hunt_stream: Callable[..., AsyncIterator[Dict]],
+                 on_complete: Optional[Callable[[str, List[Dict]], None]] = None):
+        self.hunt_stream = hunt_stream
+        self.on_complete = on_complete
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"hunts": 0, "coalesced": 0, "complete": 0, "incomplete": 0}
+
+    def in_flight(self, domain: str) -> bool:
+        return normalize_scan_domain(domain) in self._flights
+
+    async def _produce(self, key: str, flight: _Flight, domain: str, hunt_kwargs):
+        def on_phase(phase: str):
+            flight.items.append({_PHASE_KEY: phase})
+            flight.publish()
+
+        def on_error(phase: str, message: str):
+            flight.phase_errors.append(f"{phase}: {message}")
+
+        try:
+            async for lead in self.hunt_stream(domain, on_phase=on_phase, on_error=on_error, **hunt_kwargs):
+                flight.items.append(lead)
+                flight.lead_count += 1
+                flight.publish()
+            self._complete(key, flight)
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.publish()
+
+    def _complete(self, key: str, flight: _Flight):
+        if flight.phase_errors:
+            self.stats["incomplete"] += 1
+            print(f"   ⚠️ [COALESCE] Caçada de {key} incompleta ({len(flight.phase_errors)} falhas): sem snapshot")
+            return
+        self.stats["complete"] += 1
+        if self.on_complete is None:
+            return
+        try:
+            self.on_complete(key, [dict(item) for item in flight.items if _PHASE_KEY not in item])
+        except Exception as e:
+            print(f"   ⚠️ [COALESCE] Erro ao finalizar caçada de {key}: {e}")
+
+    async def subscribe(self, domain: str, on_phase: Optional[Callable[[str], None]] = None,
+                        **hunt_kwargs) -> AsyncIterator[Dict]:
+        key = normalize_scan_domain(domain)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, key, hunt_kwargs))
+            self.stats["hunts"] += 1
+        else:
+            self.stats["coalesced"] += 1
+            print(f"   🔗 [COALESCE] Varredura de {key} já em andamento: reaproveitando ({flight.lead_count} leads até agora)")
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(flight.items):
+                    item = flight.items[position]
+                    position += 1
+                    if _PHASE_KEY in item:
+                        if on_phase is not None:
+                            on_phase(item[_PHASE_KEY])
+                        continue
+                    yield dict(item) # Cópia: cada inscrito pode anotar o próprio lead
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.updated.wait()
+        finally:
+            flight.subscribers -= 1
+            # Ninguém mais ouvindo: não vale manter Chromium e SMTP ocupados
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def stop(self):
+        tasks = [flight.task for flight in self._flights.values() if flight.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._flights.clear()
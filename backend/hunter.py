@@ -1,9 +1,13 @@
-from playwright.async_api import async_playwright
-import re
 import urllib.parse
 import unicodedata
 import asyncio
-from typing import List, Dict, Set
+import weakref
+from typing import AsyncIterator, Callable, List, Dict, Set, Optional
+from browser_pool import BrowserPool
+from extractor import BLACKLIST_TERMS, extract_emails_from_text, is_blacklisted
+from resource_blocker import InterceptionProfile
+from serp_cache import SerpCache
+from fetcher import SiteFetcher, FETCH_MODES, DEFAULT_FETCH_MODE, needs_js_rendering, extract_links_from_html, extract_title_from_html
 
 # --- UTILITÁRIOS ---
 def remove_accents(input_str):
@@ -11,326 +15,528 @@ def remove_accents(input_str):
     nfkd_form = unicodedata.normalize('NFKD', input_str)
     return "".join([c for c in nfkd_form if not unicodedata.combining(c)])
 
-BLACKLIST_TERMS = [
-    "na.hora", "nas.horas", "na.semana", "no.mes", "no.ano", 
-    "em.portugues", "videos", "pesquisar", "resultados", "modo", 
-    "letra", "google", "bing", "yahoo", "duckduckgo", "search",
-    "mapas", "shopping", "imagens", "noticias", "livros", "voos", "financas"
-]
+# --- CRAWLER CONCORRENTE (FASE 1) ---
+CRAWL_MAX_CONCURRENCY = 4   # Abas abertas ao mesmo tempo no contexto
+CRAWL_PER_HOST_LIMIT = 3    # Educação: máximo de requisições simultâneas no mesmo host
+CRAWL_PAGE_TIMEOUT = 10000
 
-def extract_emails_from_text(text: str, domain: str) -> Set[str]:
-    """Regex para extrair e-mails de um texto cru"""
-    if not text: return set()
-    
-    # Regex melhorado para evitar pontos finais no email (ex: email@dominio.com.)
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    matches = re.findall(email_pattern, text)
-    valid_emails = set()
-    
-    for email in matches:
-        # Remove ponto final se houver (comum em finais de frase)
-        email = email.rstrip('.')
-        
-        if domain in email.lower():
-            if not email.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.css', '.js', '.webp', '.svg', '.woff')):
-                # Filter Blacklist
-                if not any(term in email.lower() for term in BLACKLIST_TERMS):
-                    valid_emails.add(email.lower())
-    return valid_emails
+# Referência fraca: o semáforo de um host só vive enquanto alguma visita a ele está em andamento
+# (um worker de longa duração não acumula um semáforo por site já visitado)
+_host_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urllib.parse.urlparse(url).netloc.lower()
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(CRAWL_PER_HOST_LIMIT)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+async def crawl_internal_pages(context, urls: List[str], clean_domain: str, seen_emails: Set[str], found_leads: List[Dict],
+                               max_concurrency: int = CRAWL_MAX_CONCURRENCY, fetcher: Optional[SiteFetcher] = None,
+                               fetch_mode: str = "browser") -> None:
+    """
+    Visita as páginas internas em paralelo (HTTP puro ou abas do mesmo contexto, conforme `fetch_mode`).
+    Cada HTML é processado assim que chega; o limite por host evita martelar o site.
+    """
+    if not urls: return
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def render(url: str) -> Optional[str]:
+        page = await context.new_page()
+        try:
+            await page.goto(url, timeout=CRAWL_PAGE_TIMEOUT)
+            return await page.content()
+        except Exception:
+            return None
+        finally:
+            await page.close()
+
+    async def visit(url: str):
+        async with slots, _host_semaphore(url):
+            print(f"   ↳ Visitando: {url}")
+            content = None
+            if fetcher is not None and fetch_mode != "browser":
+                fetched = await fetcher.fetch(url)
+                if fetched and (fetch_mode == "http" or not needs_js_rendering(fetched[1])):
+                    content = fetched[1]
+            if content is None and fetch_mode != "http":
+                content = await render(url)
+        if content is None: return
+
+        for email in extract_emails_from_text(content, clean_domain):
+            if email not in seen_emails:
+                print(f"   TEXTO ENCONTRADO (Interna): {email}")
+                found_leads.append({"name": "Contato Interno", "email": email, "linkedin": None, "role": "Página Interna"})
+                seen_emails.add(email)
+
+    await asyncio.gather(*(visit(url) for url in urls))
+
+def _company_name_from_title(page_title: Optional[str]) -> Optional[str]:
+    """Limpa termos comuns de SEO do <title> para tentar isolar o nome da empresa."""
+    if not page_title: return None
+    clean_title = page_title.split('-')[0].split('|')[0].split(':')[0]
+    clean_title = clean_title.replace("Home", "").replace("Início", "").replace("Site Oficial", "").strip()
+    return clean_title if len(clean_title) > 2 else None
+
+async def _render_home(page, clean_domain: str):
+    """Carrega a home no Chromium (HTTPS com fallback HTTP). Retorna (base_url, html)."""
+    base_url = f"https://{clean_domain}"
+    try:
+        await page.goto(base_url, timeout=12000)
+    except Exception:
+        print(f"   ⚠️ HTTPS falhou, tentando HTTP para {clean_domain}...")
+        base_url = f"http://{clean_domain}"
+        await page.goto(base_url, timeout=12000)
+    await asyncio.sleep(2)
+    return base_url, await page.content()
+
+# --- EXTRAÇÃO DE LINKS (1 ida e volta ao browser) ---
+# Lê todos os pares (href, texto) num único page.evaluate em vez de 2 RPCs por âncora.
+# O filtro `needle` roda dentro do browser, então só os links relevantes atravessam o CDP.
+_EXTRACT_LINKS_JS = """
+(needle) => {
+    const out = [];
+    for (const a of document.querySelectorAll('a[href]')) {
+        const href = a.getAttribute('href');
+        if (!href || (needle && !href.includes(needle))) continue;
+        out.push([href, a.innerText || '']);
+    }
+    return out;
+}
+"""
+
+async def extract_links(page, href_contains: Optional[str] = None) -> List[tuple]:
+    """Retorna [(href, texto), ...] de todas as âncoras da página, opcionalmente filtradas pelo href."""
+    try:
+        return [tuple(pair) for pair in await page.evaluate(_EXTRACT_LINKS_JS, href_contains)]
+    except Exception:
+        return []
+
+# --- EXECUTOR DE BUSCAS (FASES 2 E 3) ---
+# Limites por buscador: (abas simultâneas, intervalo mínimo entre requisições em segundos).
+# São globais ao processo porque o bloqueio dos buscadores é por IP, não por varredura.
+SERP_ENGINE_LIMITS = {
+    "bing": (3, 1.0),
+    "google": (1, 3.0),
+}
+SERP_PAGE_TIMEOUT = 20000
+SERP_SETTLE_DELAY = 2  # Tempo para o SERP terminar de renderizar
+# Sinais de captcha / tela de consentimento no lugar do SERP (URL ou título, em minúsculas)
+SERP_BLOCK_URL_MARKERS = ("google.com/sorry", "consent.google", "consent.bing", "captcha", "/challenge")
+SERP_BLOCK_TITLE_MARKERS = ("captcha", "unusual traffic", "tráfego incomum", "before you continue",
+                            "antes de continuar", "verify you are human", "verifique se você é humano")
+
+async def _serp_block_reason(page) -> Optional[str]:
+    """
+    Chamado quando o SERP não trouxe nenhum perfil: distingue bloqueio de "a busca não achou ninguém".
+    Retorna o motivo do bloqueio, ou None se a página é um SERP normal sem perfis.
+    """
+    url = page.url.lower()
+    if any(marker in url for marker in SERP_BLOCK_URL_MARKERS):
+        return f"bloqueio ({page.url})"
+    try:
+        title = (await page.title()).lower()
+        anchors = await page.evaluate("document.links.length")
+    except Exception as e:
+        return f"página ilegível: {e}"
+    if any(marker in title for marker in SERP_BLOCK_TITLE_MARKERS):
+        return f"bloqueio (título: {title})"
+    if not anchors:
+        return "página sem nenhum link"
+    return None
+
+class _EngineLimiter:
+    """Semáforo de concorrência + espaçamento mínimo entre requisições de um buscador."""
+    def __init__(self, concurrency: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait_turn(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+_engine_limiters: Dict[str, _EngineLimiter] = {}
+
+def _engine_limiter(engine: str) -> _EngineLimiter:
+    if engine not in _engine_limiters:
+        concurrency, min_interval = SERP_ENGINE_LIMITS.get(engine, (1, 2.0))
+        _engine_limiters[engine] = _EngineLimiter(concurrency, min_interval)
+    return _engine_limiters[engine]
+
+async def run_serp_queries(context, engine: str, jobs: List[tuple], harvest, should_run=lambda: True,
+                           cache: Optional[SerpCache] = None, bypass_cache: bool = False,
+                           on_error: Optional[Callable[[str], None]] = None) -> List[int]:
+    """
+    Roda as queries de um buscador em abas paralelas do mesmo contexto.
+    `jobs` é uma lista de (query, url, rótulo); `harvest(links, rótulo)` recebe os pares
+    (href, título) de cada SERP assim que ela carrega. `should_run()` é checado antes de
+    cada query (ex: teto de leads). Com `cache`, SERPs já vistos vêm do disco sem abrir aba;
+    `bypass_cache` ignora a leitura mas ainda grava o resultado novo.
+    `on_error(mensagem)` é chamado quando uma query falha ou é bloqueada (captcha, consentimento,
+    página sem links). SERP normal sem perfis do LinkedIn é resultado válido, não erro.
+    """
+    limiter = _engine_limiter(engine)
+
+    async def run_one(query: str, url: str, label: str) -> int:
+        if not should_run():
+            return 0
+        if cache is not None and not bypass_cache:
+            links = cache.get(engine, query)
+            if links is not None:
+                print(f"   ↳ {engine.capitalize()} Query (cache): {label}")
+                return harvest(links, label)
+
+        async with limiter.semaphore:
+            if not should_run():
+                return 0
+            await limiter.wait_turn()
+            print(f"   ↳ {engine.capitalize()} Query: {label}")
+            page = await context.new_page()
+            try:
+                await page.goto(url, timeout=SERP_PAGE_TIMEOUT)
+                await asyncio.sleep(SERP_SETTLE_DELAY)
+                links = await extract_links(page, "linkedin.com/in/")
+                block = await _serp_block_reason(page) if not links else None
+            except Exception as e:
+                print(f"      ⚠️ Erro no {engine.capitalize()}: {e}")
+                if on_error: on_error(f"{label}: {e}")
+                return 0
+            finally:
+                await page.close()
+
+        if block:
+            print(f"      🚧 {engine.capitalize()} bloqueou a query ({label}): {block}")
+            if on_error: on_error(f"{label}: {block}")
+        # SERP vazio pode ser bloqueio que não reconhecemos: não vale a pena cachear
+        if links and cache is not None:
+            cache.put(engine, query, links)
+        return harvest(links, label)
+
+    return await asyncio.gather(*(run_one(query, url, label) for query, url, label in jobs))
+
+def _bing_url(query: str) -> str:
+    return f"https://www.bing.com/search?q={urllib.parse.quote(query)}&count=50"
+
+def _google_url(query: str, num: int) -> str:
+    return f"https://www.google.com/search?q={urllib.parse.quote(query)}&num={num}&hl=pt-BR"
+
+def _linkedin_lead_count(found_leads: List[Dict]) -> int:
+    return len([l for l in found_leads if l['linkedin']])
+
+def _add_guessed_leads(name_raw: str, href: str, role: str, clean_domain: str,
+                       seen_emails: Set[str], found_leads: List[Dict], label: str) -> int:
+    """Gera os 2 padrões corporativos mais comuns (nome.sobrenome@ e nome@) para um perfil."""
+    name_parts = name_raw.split()
+    first = remove_accents(name_parts[0].lower())
+    last = remove_accents(name_parts[-1].lower())
+    clean_domain = clean_domain.lower() # is_blacklisted espera o e-mail todo em minúsculas
+
+    count = 0
+    for em in [f"{first}.{last}@{clean_domain}", f"{first}@{clean_domain}"]:
+        if em not in seen_emails:
+            # Filter Blacklist
+            if not is_blacklisted(em):
+                print(f"      👤 {label}: {name_raw} -> {em}")
+                found_leads.append({"name": name_raw, "email": em, "linkedin": href, "role": role})
+                seen_emails.add(em)
+                count += 1
+    return count
+
+def _parse_bing_title(title: str):
+    """Separa nome e cargo do título de um resultado do Bing. Retorna None se não for um perfil."""
+    clean_title = title.split(" - LinkedIn")[0].split(" | LinkedIn")[0]
+    clean_title = clean_title.replace("...", "").replace("Perfil profissional", "").replace("Perfil", "").strip()
+
+    if any(x in clean_title.lower() for x in ["login", "vagas", "job", "company", "linkedin"]): return None
+    if len(clean_title.split()) < 2: return None
+
+    separators = [" - ", " | ", ",", " – "]
+    name_raw = clean_title
+    role_raw = "Funcionário"
+    for sep in separators:
+        if sep in clean_title:
+            parts = clean_title.split(sep)
+            name_raw = parts[0].strip()
+            role_full = parts[1].strip()
+            role_raw = role_full.split(" na ")[0].split(" at ")[0].strip()
+            break
+
+    if len(name_raw.split()) < 2: return None
+    return name_raw, role_raw
+
+def _parse_google_title(title: str):
+    """Extrai o nome do título de um resultado do Google. Retorna None se não for um perfil."""
+    clean_title = title.split(" - LinkedIn")[0].split(" | LinkedIn")[0].replace("...", "").replace("Perfil profissional", "").replace("Perfil", "").strip()
+    if any(x in clean_title.lower() for x in ["login", "vagas", "job"]): return None
+
+    name_raw = clean_title.split(" - ")[0].split(" | ")[0].strip()
+    if len(name_raw.split()) < 2: return None
+    return name_raw
+
+def _harvest_bing_links(links: List[tuple], clean_domain: str, seen_emails: Set[str], found_leads: List[Dict]) -> int:
+    count_valid = 0
+    for href, title in links:
+        if not href or "linkedin.com/in/" not in href: continue
+        if not title: continue
+
+        parsed = _parse_bing_title(title)
+        if not parsed: continue
+        name_raw, role_raw = parsed
+        count_valid += _add_guessed_leads(name_raw, href, role_raw, clean_domain, seen_emails, found_leads, "Bing Capturou")
+    return count_valid
+
+def _harvest_google_links(links: List[tuple], clean_domain: str, seen_emails: Set[str], found_leads: List[Dict], label: str) -> int:
+    count_valid = 0
+    for href, title in links:
+        if not href or "linkedin.com/in/" not in href: continue
+        if not title: continue
+
+        name_raw = _parse_google_title(title)
+        if not name_raw: continue
+        count_valid += _add_guessed_leads(name_raw, href, "Detectado via Google", clean_domain, seen_emails, found_leads, label)
+    return count_valid
+
+# --- STREAMING DE LEADS ---
+class _LeadStream(list):
+    """
+    Lista de leads da caçada que também publica cada append numa fila,
+    marcando a fase em que o lead apareceu ("site", "bing" ou "google").
+    """
+    def __init__(self):
+        super().__init__()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.phase = "site"
+
+    def append(self, lead: Dict):
+        lead.setdefault("phase", self.phase)
+        super().append(lead)
+        self.queue.put_nowait(lead)
+
+async def hunt_emails_stream(domain: str, **hunt_kwargs) -> AsyncIterator[Dict]:
+    """
+    Variante streaming de hunt_emails_on_web: entrega cada lead no momento em que é
+    encontrado, com a chave extra "phase". Aceita os mesmos parâmetros.
+    Se o consumidor parar no meio, a caçada é cancelada.
+    """
+    found_leads = _LeadStream()
+    hunt = asyncio.create_task(_run_hunt(domain, found_leads, **hunt_kwargs))
+    hunt.add_done_callback(lambda _task: found_leads.queue.put_nowait(None))
+    try:
+        while True:
+            lead = await found_leads.queue.get()
+            if lead is None:
+                break
+            yield lead
+        await hunt  # Propaga exceções da caçada
+    finally:
+        if not hunt.done():
+            hunt.cancel()
+            try:
+                await hunt
+            except (asyncio.CancelledError, Exception):
+                pass
 
 # --- O ROBÔ ---
-async def hunt_emails_on_web(domain: str) -> List[Dict]:
+async def hunt_emails_on_web(domain: str, **hunt_kwargs) -> List[Dict]:
+    """Caçada completa de uma vez (scripts de debug). Ver _run_hunt para os parâmetros."""
+    return [lead async for lead in hunt_emails_stream(domain, **hunt_kwargs)]
+
+async def _run_hunt(domain: str, found_leads: List[Dict],
+                    pool: Optional[BrowserPool] = None,
+                    interception: Optional[InterceptionProfile] = None,
+                    fetcher: Optional[SiteFetcher] = None,
+                    fetch_mode: str = DEFAULT_FETCH_MODE,
+                    serp_cache: Optional[SerpCache] = None,
+                    bypass_cache: bool = False,
+                    on_phase: Optional[Callable[[str], None]] = None,
+                    on_error: Optional[Callable[[str, str], None]] = None) -> List[Dict]:
     """
     ESTRATÉGIA HÍBRIDA V3 (Smart Recon):
     1. Crawler: Varre o site e DESCOBRE o nome real da empresa (Title).
     2. Bing/Google: Usa o nome real descoberto para achar perfis.
+
+    Se `pool` for informado (app FastAPI), usa um contexto do pool compartilhado.
+    Sem pool (scripts de debug), sobe um Chromium só para esta caçada.
+    `interception` define o que é bloqueado (imagens, fontes, trackers...); padrão: InterceptionProfile().
+    `fetch_mode` ("auto", "http", "browser") decide se a Fase 1 usa HTTP puro ou o Chromium.
+    `serp_cache` reaproveita buscas Bing/Google já feitas; `bypass_cache` força buscar de novo.
+    `on_phase(fase)` é chamado a cada transição: "site", "bing", "google" e "done".
+    `on_error(fase, mensagem)` é chamado quando uma fase falha ou é bloqueada (caçada incompleta).
     """
-    clean_domain = domain.replace("http://", "").replace("https://", "").replace("www.", "").split("/")[0]
+    clean_domain = domain.strip().lower().replace("http://", "").replace("https://", "").replace("www.", "").split("/")[0]
     # Nome de fallback caso o crawler falhe
     company_name_fallback = clean_domain.split('.')[0]
     real_company_name = None
     
-    found_leads = []
     seen_emails = set()
     
     target_pages_keywords = ['contato', 'contact', 'sobre', 'about', 'equipe', 'team', 'quem-somos', 'quem_somos', 'fale-conosco', 'time', 'nosso-time']
     
     print(f"🚀 [INIT] Iniciando Caçada para: {clean_domain}")
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True, # MODO INVISÍVEL (Solicitado pelo usuário)
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 800}
-        )
-        
-        # --- FASE 1: CRAWLER INTERNO (SENSING) ---
-        print("🕷️ [FASE 1] Iniciando Crawler no Site Oficial...")
-        page = await context.new_page()
-        
-        base_url = f"https://{clean_domain}"
-        site_loaded = False
-        
-        try:
+    def enter_phase(phase: str):
+        found_leads.phase = phase
+        if on_phase: on_phase(phase)
+
+    def phase_error(message: str):
+        if on_error: on_error(found_leads.phase, message)
+
+    if fetch_mode not in FETCH_MODES:
+        fetch_mode = DEFAULT_FETCH_MODE
+
+    owns_pool = pool is None
+    if owns_pool:
+        pool = BrowserPool(max_contexts=1, health_interval=0) # MODO INVISÍVEL (headless)
+        await pool.start()
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = SiteFetcher()
+
+    try:
+        async with pool.context() as context:
+            if interception is None:
+                interception = InterceptionProfile()
+            await interception.install(context)
+
+            # --- FASE 1: CRAWLER INTERNO (SENSING) ---
+            interception.set_phase("site")
+            enter_phase("site")
+            print("🕷️ [FASE 1] Iniciando Crawler no Site Oficial...")
+            page = None
             try:
-                await page.goto(base_url, timeout=12000)
-                site_loaded = True
-            except:
-                print(f"   ⚠️ HTTPS falhou, tentando HTTP para {clean_domain}...")
-                base_url = f"http://{clean_domain}"
-                await page.goto(base_url, timeout=12000)
-                site_loaded = True
-
-            if site_loaded:
-                # --- AUTO-DISCOVERY: Detecta nome real da empresa pelo Título ---
-                try:
-                    page_title = await page.title()
-                    if page_title:
-                        # Limpa termos comuns de SEO para tentar isolar o nome
-                        clean_title = page_title.split('-')[0].split('|')[0].split(':')[0]
-                        clean_title = clean_title.replace("Home", "").replace("Início", "").replace("Site Oficial", "").strip()
-                        if len(clean_title) > 2:
-                            real_company_name = clean_title
-                            print(f"   💡 Nome da Empresa Identificado: '{real_company_name}'")
-                except:
-                    pass
-
-                await asyncio.sleep(2)
-                
-                # 1.1: E-mails da Home
-                content = await page.content()
-                home_emails = extract_emails_from_text(content, clean_domain)
-                for email in home_emails:
-                    if email not in seen_emails:
-                        print(f"   TEXTO ENCONTRADO (Home): {email}")
-                        found_leads.append({"name": "Contato Site", "email": email, "linkedin": None, "role": "Site Oficial"})
-                        seen_emails.add(email)
-
-                # 1.2: Visitar links internos
-                try:
-                    all_links = await page.locator("a").all()
+                home = None
+                if fetch_mode != "browser":
+                    home = await fetcher.fetch_site(clean_domain)
+                    if home and fetch_mode == "auto" and needs_js_rendering(home[1]):
+                        print("   🧩 Home depende de JavaScript, renderizando no Chromium...")
+                        home = None
+                    elif home:
+                        print("   ⚡ Home carregada via HTTP (sem browser)")
+                if home is None and fetch_mode != "http":
+                    page = await context.new_page()
+                    home = await _render_home(page, clean_domain)
+
+                if home:
+                    base_url, content = home
+
+                    # --- AUTO-DISCOVERY: Detecta nome real da empresa pelo Título ---
+                    real_company_name = _company_name_from_title(extract_title_from_html(content))
+                    if real_company_name:
+                        print(f"   💡 Nome da Empresa Identificado: '{real_company_name}'")
+
+                    # 1.1: E-mails da Home
+                    home_emails = extract_emails_from_text(content, clean_domain)
+                    for email in home_emails:
+                        if email not in seen_emails:
+                            print(f"   TEXTO ENCONTRADO (Home): {email}")
+                            found_leads.append({"name": "Contato Site", "email": email, "linkedin": None, "role": "Site Oficial"})
+                            seen_emails.add(email)
+
+                    # 1.2: Visitar links internos
                     links_to_visit = set()
-                    
-                    for link in all_links:
-                        try:
-                            href = await link.get_attribute("href")
-                            if href:
-                                full_url = urllib.parse.urljoin(base_url, href)
-                                if clean_domain in full_url and any(kw in full_url.lower() for kw in target_pages_keywords):
-                                    links_to_visit.add(full_url)
-                        except:
-                            continue
-                except:
-                    pass
-
-                for url in list(links_to_visit)[:5]: 
-                    try:
-                        print(f"   ↳ Visitando: {url}")
-                        await page.goto(url, timeout=10000)
-                        content = await page.content()
-                        page_emails = extract_emails_from_text(content, clean_domain)
-                        for email in page_emails:
-                            if email not in seen_emails:
-                                print(f"   TEXTO ENCONTRADO (Interna): {email}")
-                                found_leads.append({"name": "Contato Interno", "email": email, "linkedin": None, "role": "Página Interna"})
-                                seen_emails.add(email)
-                    except:
-                        continue
-            else:
-                print("   ⚠️ Não foi possível carregar o site da empresa.")
-
-        except Exception as e:
-            print(f"⚠️ Erro no Crawler do Site: {e}")
-
-        # --- FASE 2: BING SEARCH (COM NOME REAL) ---
-        print("\n🔍 [FASE 2] Iniciando Busca no Bing...")
+                    home_links = await extract_links(page) if page else extract_links_from_html(content)
+                    for href, _text in home_links:
+                        full_url = urllib.parse.urljoin(base_url, href)
+                        if clean_domain in full_url and any(kw in full_url.lower() for kw in target_pages_keywords):
+                            links_to_visit.add(full_url)
+
+                    # Visita as páginas em paralelo (o tempo total ≈ a página mais lenta)
+                    await crawl_internal_pages(context, list(links_to_visit)[:5], clean_domain, seen_emails, found_leads,
+                                               fetcher=fetcher, fetch_mode=fetch_mode)
+                else:
+                    print("   ⚠️ Não foi possível carregar o site da empresa.")
+                    phase_error("Site não carregou")
+
+            except Exception as e:
+                print(f"⚠️ Erro no Crawler do Site: {e}")
+                phase_error(str(e))
+            finally:
+                if page is not None:
+                    await page.close()
+
+            # --- FASE 2: BING SEARCH (COM NOME REAL) ---
+            print("\n🔍 [FASE 2] Iniciando Busca no Bing...")
+            interception.set_phase("serp")
+            enter_phase("bing")
         
-        # Decide qual nome usar
-        target_name = real_company_name if real_company_name else company_name_fallback
+            # Decide qual nome usar
+            target_name = real_company_name if real_company_name else company_name_fallback
         
-        # Estratégia de Queries (Mais amplas para capturar empresas que os funcionários não colocam o .com.br)
-        search_queries = [
-            f'site:linkedin.com/in/ "{target_name}"',                  # Nome solto (MUITO MAIS RESULTADOS)
-            f'site:linkedin.com/in/ "{target_name}" "Brasil"',         # Nome + País
-            f'site:linkedin.com/in/ "{target_name}" "{clean_domain}"', # Nome + Domínio
-            f'site:linkedin.com/in/ "{clean_domain}"',                 # Domínio isolado
-        ]
+            # Estratégia de Queries (Mais amplas para capturar empresas que os funcionários não colocam o .com.br)
+            search_queries = [
+                f'site:linkedin.com/in/ "{target_name}"',                  # Nome solto (MUITO MAIS RESULTADOS)
+                f'site:linkedin.com/in/ "{target_name}" "Brasil"',         # Nome + País
+                f'site:linkedin.com/in/ "{target_name}" "{clean_domain}"', # Nome + Domínio
+                f'site:linkedin.com/in/ "{clean_domain}"',                 # Domínio isolado
+            ]
         
-        # Se for .br, prioriza buscas locais (move para primeiro)
-        if ".br" in domain:
-             search_queries.insert(0, f'site:linkedin.com/in/ "{target_name}" "Brasil"')
+            # Se for .br, prioriza buscas locais (move para primeiro)
+            if ".br" in domain:
+                 search_queries.insert(0, f'site:linkedin.com/in/ "{target_name}" "Brasil"')
 
-        bing_success = False
+            # Remove duplicatas mantendo a ordem (o insert do .br repete a query "Brasil")
+            search_queries = list(dict.fromkeys(search_queries))
 
-        for query in search_queries:
-            # Aumentando limite de paginação/leads provisórios para o limite extremo (100)
-            if len([l for l in found_leads if l['linkedin']]) >= 50: break
+            # Queries do Bing rodam em abas paralelas; o teto de 50 leads é checado antes de cada uma
+            def harvest_bing(links, query):
+                count_valid = _harvest_bing_links(links, clean_domain, seen_emails, found_leads)
+                print(f"      ✅ Leads nesta página ({query}): {count_valid}")
+                return count_valid
 
-            print(f"   ↳ Bing Query: {query}")
-            try:
-                encoded_query = urllib.parse.quote(query)
-                bing_url = f"https://www.bing.com/search?q={encoded_query}&count=50"
-                
-                await page.goto(bing_url, timeout=20000)
-                await asyncio.sleep(2)
-                
-                all_links = await page.locator("a").all()
-                count_valid = 0
-                
-                for link in all_links:
-                    try:
-                        href = await link.get_attribute("href")
-                        if not href or "linkedin.com/in/" not in href: continue
-                        
-                        title = await link.inner_text()
-                        if not title: continue
-                        
-                        clean_title = title.split(" - LinkedIn")[0].split(" | LinkedIn")[0]
-                        clean_title = clean_title.replace("...", "").replace("Perfil profissional", "").replace("Perfil", "").strip()
-
-                        if any(x in clean_title.lower() for x in ["login", "vagas", "job", "company", "linkedin"]): continue
-
-                        if len(clean_title.split()) < 2: continue
-                        
-                        separators = [" - ", " | ", ",", " – "]
-                        name_raw = clean_title
-                        role_raw = "Funcionário"
-                        
-                        found_sep = False
-                        for sep in separators:
-                            if sep in clean_title:
-                                parts = clean_title.split(sep)
-                                name_raw = parts[0].strip()
-                                role_full = parts[1].strip()
-                                role_raw = role_full.split(" na ")[0].split(" at ")[0].strip()
-                                found_sep = True
-                                break
-                        
-                        if len(name_raw.split()) < 2: continue
-                        
-                        name_parts = name_raw.split()
-                        first = remove_accents(name_parts[0].lower())
-                        last = remove_accents(name_parts[-1].lower())
-                        
-                        # Dobrando as chances de acerto gerando 2 padrões corporativos comuns
-                        email_v1 = f"{first}.{last}@{clean_domain}"
-                        email_v2 = f"{first}@{clean_domain}"
-                        
-                        emails_to_try = [email_v1, email_v2]
-                        
-                        for em in emails_to_try:
-                            if em not in seen_emails:
-                                # Filter Blacklist
-                                if not any(term in em.lower() for term in BLACKLIST_TERMS):
-                                    print(f"      👤 Bing Capturou: {name_raw} -> Tentando: {em}")
-                                    found_leads.append({"name": name_raw, "email": em, "linkedin": href, "role": role_raw})
-                                    seen_emails.add(em)
-                                    count_valid += 1
-                                    bing_success = True
-
-                    except Exception as e:
-                        continue
-                
-                print(f"      ✅ Leads nesta página: {count_valid}")
+            bing_jobs = [(query, _bing_url(query), query) for query in search_queries]
+            await run_serp_queries(context, "bing", bing_jobs, harvest_bing,
+                                   should_run=lambda: _linkedin_lead_count(found_leads) < 50,
+                                   cache=serp_cache, bypass_cache=bypass_cache, on_error=phase_error)
 
-            except Exception as e:
-                print(f"      ⚠️ Erro no Bing: {e}")
-                continue
+            # --- FASE 3: GOOGLE FALLBACK (Muito mais agressivo) ---
+            # Se achou menos de 20 leads no Bing, solta o Google para complementar focado em volume
+            if _linkedin_lead_count(found_leads) < 20:
+                print(f"\n⚠️ Expandindo alcance com Google (Volume Máximo)...")
+                enter_phase("google")
+                try:
+                    # Usa query BROAD no Google removendo o domínio exato obrigatório
+                    query = f'site:linkedin.com/in/ "{target_name}" -intitle:jobs'
 
-        # --- FASE 3: GOOGLE FALLBACK (Muito mais agressivo) ---
-        # Se achou menos de 20 leads no Bing, solta o Google para complementar focado em volume
-        if len([l for l in found_leads if l['linkedin']]) < 20:
-            print(f"\n⚠️ Expandindo alcance com Google (Volume Máximo)...")
-            try:
-                # Usa query BROAD no Google removendo o domínio exato obrigatório
-                query = f'site:linkedin.com/in/ "{target_name}" -intitle:jobs'
-                encoded_query = urllib.parse.quote(query)
-                google_url = f"https://www.google.com/search?q={encoded_query}&num=100&hl=pt-BR"
-                
-                await page.goto(google_url, timeout=20000)
-                await asyncio.sleep(2)
-                
-                google_links = await page.locator("a").all()
-                count_valid_google = 0
-                
-                for link in google_links:
-                    try:
-                        href = await link.get_attribute("href")
-                        if not href or "linkedin.com/in/" not in href: continue
-                        title = await link.inner_text()
-                        if not title: continue
-                        
-                        clean_title = title.split(" - LinkedIn")[0].split(" | LinkedIn")[0].replace("...", "").replace("Perfil profissional", "").replace("Perfil", "").strip()
-                        if any(x in clean_title.lower() for x in ["login", "vagas", "job"]): continue
-                        
-                        name_raw = clean_title.split(" - ")[0].split(" | ")[0].strip()
-                        if len(name_raw.split()) < 2: continue
-                        
-                        name_parts = name_raw.split()
-                        first = remove_accents(name_parts[0].lower())
-                        last = remove_accents(name_parts[-1].lower())
-                        
-                        em_v1 = f"{first}.{last}@{clean_domain}"
-                        em_v2 = f"{first}@{clean_domain}"
-                        
-                        for em in [em_v1, em_v2]:
-                            if em not in seen_emails:
-                                # Filter Blacklist
-                                if not any(term in em.lower() for term in BLACKLIST_TERMS):
-                                    print(f"      👤 Google Capturou: {name_raw} -> {em}")
-                                    found_leads.append({"name": name_raw, "email": em, "linkedin": href, "role": "Detectado via Google"})
-                                    seen_emails.add(em)
-                                    count_valid_google += 1
-                    except: continue
-                print(f"      ✅ Leads Google (Round 1): {count_valid_google}")
-
-                # Se ainda achou pouco (menos de 5), tenta mais uma query com "Cargo"
-                if len([l for l in found_leads if l['linkedin']]) < 5:
-                    print("      🔎 Aprofundando busca no Google (Round 2)...")
-                    # Query focado em cargos comuns
-                    query2 = f'site:linkedin.com/in/ "{target_name}" (gerente OR diretor OR analista OR coordenador OR supervisor)'
-                    encoded_query2 = urllib.parse.quote(query2)
-                    google_url2 = f"https://www.google.com/search?q={encoded_query2}&num=50&hl=pt-BR"
-                    
-                    await page.goto(google_url2, timeout=20000)
-                    await asyncio.sleep(2)
-                    
-                    google_links2 = await page.locator("a").all()
-                    for link in google_links2:
-                        try:
-                            href = await link.get_attribute("href")
-                            if not href or "linkedin.com/in/" not in href: continue
-                            title = await link.inner_text()
-                            if not title: continue
-                            
-                            clean_title = title.split(" - LinkedIn")[0].split(" | LinkedIn")[0].replace("...", "").replace("Perfil profissional", "").replace("Perfil", "").strip()
-                            if any(x in clean_title.lower() for x in ["login", "vagas", "job"]): continue
-                            
-                            name_raw = clean_title.split(" - ")[0].split(" | ")[0].strip()
-                            if len(name_raw.split()) < 2: continue
-                            
-                            name_parts = name_raw.split()
-                            first = remove_accents(name_parts[0].lower())
-                            last = remove_accents(name_parts[-1].lower())
-                            
-                            for em in [f"{first}.{last}@{clean_domain}", f"{first}@{clean_domain}"]:
-                                if em not in seen_emails:
-                                    if not any(term in em.lower() for term in BLACKLIST_TERMS):
-                                        print(f"      👤 Google Round 2: {name_raw} -> {em}")
-                                        found_leads.append({"name": name_raw, "email": em, "linkedin": href, "role": "Detectado via Google"})
-                                        seen_emails.add(em)
-                        except: continue
+                    def harvest_google(links, label):
+                        count_valid_google = _harvest_google_links(links, clean_domain, seen_emails, found_leads, label)
+                        print(f"      ✅ Leads {label}: {count_valid_google}")
+                        return count_valid_google
 
-            except Exception as e:
-                print(f"⚠️ Erro no Google Fallback: {e}")
+                    await run_serp_queries(context, "google", [(query, _google_url(query, 100), "Google (Round 1)")], harvest_google,
+                                           cache=serp_cache, bypass_cache=bypass_cache, on_error=phase_error)
+
+                    # Se ainda achou pouco (menos de 5), tenta mais uma query com "Cargo"
+                    if _linkedin_lead_count(found_leads) < 5:
+                        print("      🔎 Aprofundando busca no Google (Round 2)...")
+                        # Query focado em cargos comuns
+                        query2 = f'site:linkedin.com/in/ "{target_name}" (gerente OR diretor OR analista OR coordenador OR supervisor)'
+                        await run_serp_queries(context, "google", [(query2, _google_url(query2, 50), "Google Round 2")], harvest_google,
+                                               cache=serp_cache, bypass_cache=bypass_cache, on_error=phase_error)
+
+                except Exception as e:
+                    print(f"⚠️ Erro no Google Fallback: {e}")
+                    phase_error(str(e))
+
+            print(f"🛡️ [REDE] Requisições: {interception.summary()}")
+            if serp_cache is not None:
+                print(f"🗄️ [CACHE] SERP hit rate: {serp_cache.hit_rate():.0%} ({serp_cache.stats['hits']} hits / {serp_cache.stats['misses']} misses)")
 
-        await browser.close()
+    finally:
+        if owns_pool:
+            await pool.stop()
+        if owns_fetcher:
+            await fetcher.stop()
 
     if not found_leads:
         print("⚠️ Nada encontrado. Retornando vazio para exibição correta na UI.")
             
     print(f"🏁 [FIM] Varredura Completa. Total de Alvos: {len(found_leads)}")
+    if on_phase: on_phase("done")
     return found_leads
\ No newline at end of file
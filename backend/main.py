@@ -4,18 +4,39 @@ import asyncio
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request, Response, Form, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Form, status
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from pydantic import BaseModel
 from typing import List, Optional
 import datetime
+import os
+import time
+import json
 import models
-from database import engine, get_db
+from database import engine, get_db, SessionLocal
 import auth
-from hunter import hunt_emails_on_web
-from verifier import verify_email_realtime
+from hunter import hunt_emails_stream
+from browser_pool import BrowserPool
+from fetcher import SiteFetcher, FetchMode, DEFAULT_FETCH_MODE
+from serp_cache import SerpCache
+from verification_cache import verify_emails_cached, store_results, load_fresh
+import verification_cache
+from verification_scheduler import VerificationScheduler, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY
+from verification_backlog import VerificationBacklog
+from scan_queue import ScanWorkerPool, enqueue_scan, is_scanning
+from hunt_coalescer import HuntCoalescer, normalize_scan_domain
+from domain_snapshots import load_snapshot, save_snapshot
+from scan_events import event_bus, format_sse
+import domain_snapshots
+from mx_cache import mx_cache
+from catchall_cache import catchall_cache
+from bulk_verify import emails_from_list, emails_from_upload, ndjson_results
+from email_classifier import classify_email, Classification
+import email_classifier
 
 models.Base.metadata.create_all(bind=engine)
 
@@ -31,9 +52,54 @@ app.add_middleware(
 
 class CompanyRequest(BaseModel):
     domain: str
+    fetch_mode: FetchMode = DEFAULT_FETCH_MODE # "auto" (HTTP + fallback Chromium), "http" ou "browser"
+    bypass_cache: bool = False            # True = caça de novo ignorando o snapshot do domínio e o cache de Bing/Google
 
-# Controle de processos em andamento para evitar falsos "Zero Leads" no Popup
-active_scans = set()
+# Leads da caçada gravados juntos (uma query IN + um INSERT em lote por lote)
+LEAD_FLUSH_SIZE = 20
+LEAD_INSERT_CHUNK = 500
+# SSE: comentário de keepalive + conferência no banco (varreduras de outros processos) a cada N segundos
+SSE_SYNC_INTERVAL = 5
+# SSE: depois da caçada o stream espera a verificação SMTP dos leads 'pending' (no máximo N segundos:
+# retentativas de greylisting levam minutos e a UI não precisa ficar presa nelas)
+SSE_VERIFY_WAIT = int(os.getenv("SSE_VERIFY_WAIT", "120"))
+# 'pending' mais antigo que isso não está na memória de nenhum processo vivo (a retentativa
+# de greylisting mais longa termina bem antes): o startup recoloca na fila
+PENDING_REQUEUE_AFTER = datetime.timedelta(seconds=RETRY_MAX_ATTEMPTS * RETRY_MAX_DELAY + 3600)
+
+# Pool de Chromium compartilhado entre as varreduras (evita cold-start a cada scan)
+browser_pool = BrowserPool()
+# Cliente HTTP da Fase 1 (conexões reaproveitadas entre varreduras)
+site_fetcher = SiteFetcher()
+# Cache em disco dos resultados de Bing/Google (reaproveitado entre usuários e reescaneamentos)
+serp_cache = SerpCache()
+# Fila de re-verificação para respostas temporárias do SMTP (greylisting, throttle)
+verification_scheduler = VerificationScheduler()
+# Verificação preguiçosa: leads entram como 'pending' e são verificados em segundo plano
+verification_backlog = VerificationBacklog(lambda emails: verify_backlog_batch(emails))
+# Varreduras simultâneas do mesmo domínio (outro usuário, clique duplo) compartilham uma única caçada
+hunt_coalescer = HuntCoalescer(hunt_emails_stream, on_complete=lambda domain, leads: save_hunt_snapshot(domain, leads))
+# Workers da fila durável de varreduras (tabela scan_jobs)
+scan_workers = ScanWorkerPool(lambda job: run_scan_job(job))
+
+@app.on_event("startup")
+async def start_browser_pool():
+    await browser_pool.start()
+    await site_fetcher.start()
+    await verification_scheduler.start()
+    await verification_backlog.start()
+    requeue_pending_leads()
+    await scan_workers.start()
+
+@app.on_event("shutdown")
+async def stop_browser_pool():
+    await scan_workers.stop()
+    await hunt_coalescer.stop()
+    await verification_backlog.stop()
+    await verification_scheduler.stop()
+    await browser_pool.stop()
+    await site_fetcher.stop()
+    serp_cache.close()
 
 @app.on_event("startup")
 def create_initial_admin():
@@ -127,10 +193,305 @@ def logout():
     resp.delete_cookie("session_token")
     return resp
 
-async def process_domain_scan(domain: str, db: Session, user_id: int):
+SITE_ROLES = ["Site Oficial", "Página Interna"]
+
+def score_lead(role: str, linkedin: Optional[str], status_validacao: str, classification: Optional[Classification] = None):
+    """SMART SCORING. Retorna (should_save, status, confidence)."""
+    confidence = 50
+    should_save = False
+
+    # Classificação offline (descartável, no-reply, sintaxe) já condena o e-mail
+    if classification is not None and classification.rejected:
+        return False, "invalid", 0
+    is_free_mail = classification is not None and classification.is_free_mail
+
+    # --- NOVA LÓGICA DE PONTUAÇÃO (SMART SCORING) ---
+
+    # A. Achado no Site (Crawler) -> Ouro (100%)
+    if role in SITE_ROLES:
+        should_save = True
+        confidence = 80 if is_free_mail else 100 # Gmail/Hotmail no site: pessoa real, mas não é o corporativo
+        status_validacao = "valid"
+
+    # B. Vindo do LinkedIn (Bing/Google) -> Prata (High Confidence)
+    elif linkedin:
+        # Se tem LinkedIn e Cargo, é uma pessoa real.
+        # Mesmo que o e-mail seja 'risky' (Catch-All), a existência da pessoa é garantida.
+        should_save = True
+        if status_validacao == "valid":
+            confidence = 98
+        elif status_validacao == "pending":
+            confidence = 70 # Pessoa real, e-mail ainda na fila de verificação
+        elif status_validacao == "risky":
+            confidence = 80 # Catch-All mas com perfil real = Alta chance
+        else:
+            confidence = 40 # Inválido, mas salvamos como "Baixa" por ter LinkedIn
+
+    # C. Genéricos (só se validar)
+    elif status_validacao != "invalid":
+        should_save = True
+        if is_free_mail:
+            confidence = 30
+        elif classification is not None and classification.is_role:
+            confidence = 40 # Caixa de função (contato@, rh@) fora do site: não é um decisor
+        else:
+            confidence = 50
+
+    return should_save, status_validacao, confidence
+
+def build_lead(lead: dict, status_validacao: str, company_id: int, user_id: int) -> Optional[models.Lead]:
+    """Aplica o SMART SCORING e monta a linha do lead (None = não vale salvar)."""
+    should_save, status_validacao, confidence = score_lead(lead["role"], lead["linkedin"], status_validacao,
+                                                           lead.get("classification"))
+    if not should_save:
+        return None
+
+    nome_parts = lead["name"].split(" ")
+    first = nome_parts[0]
+    last = " ".join(nome_parts[1:]) if len(nome_parts) > 1 else ""
+
+    return models.Lead(
+        email=lead["email"],
+        first_name=first,
+        last_name=last,
+        status=status_validacao,
+        verification_queued_at=datetime.datetime.utcnow() if status_validacao == "pending" else None,
+        confidence_score=confidence,
+        company_id=company_id,
+        user_id=user_id,
+        linkedin_url=lead["linkedin"],
+        job_title=lead["role"]
+    )
+
+def insert_leads(db: Session, rows: List[models.Lead], chunk_size: int = LEAD_INSERT_CHUNK):
+    """
+    INSERT em lote (pedaços de chunk_size, uma transação só). A trava UNIQUE (user_id, email)
+    + ON DUPLICATE KEY UPDATE faz a corrida entre duas varreduras virar no-op em vez de duplicata.
+    """
+    if not rows:
+        return
+    columns = [c.name for c in models.Lead.__table__.columns if c.name != "id"]
+    values = [{name: getattr(row, name) for name in columns} for row in rows]
+    for row in values:
+        row["is_saved"] = bool(row["is_saved"])
+    for i in range(0, len(values), chunk_size):
+        stmt = mysql_insert(models.Lead).values(values[i:i + chunk_size])
+        db.execute(stmt.on_duplicate_key_update(email=stmt.inserted.email))
+
+def persist_leads(db: Session, leads: List[dict], company_id: int, user_id: int) -> List[dict]:
+    """
+    Grava um lote de leads da caçada: uma query IN para os e-mails que o usuário já tem,
+    linhas montadas em memória e um insert em lote. Retorna os leads efetivamente novos.
+    """
+    unique = {}
+    for lead in leads:
+        unique.setdefault(lead["email"], lead)
+    if not unique:
+        return []
+    existing = {row.email for row in db.query(models.Lead.email).filter(
+        models.Lead.user_id == user_id,
+        models.Lead.email.in_(list(unique))
+    )}
+
+    rows, saved = [], []
+    for email, lead in unique.items():
+        if email in existing:
+            continue
+        # Achado no site tem veredito fixo (valid/100): não gasta SMTP. O resto espera o backlog.
+        novo_lead = build_lead(lead, "valid" if lead["role"] in SITE_ROLES else "pending", company_id, user_id)
+        if novo_lead is None:
+            continue
+        rows.append(novo_lead)
+        saved.append(lead)
+        print(f"   💾 ENCONTRADO/PROCESSADO [{lead.get('phase', '?')}]: {lead['name']} ({email}) [{novo_lead.status} | {novo_lead.confidence_score}%]")
+    try:
+        insert_leads(db, rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao salvar leads: {e}")
+        return []
+    return saved
+
+def lead_payload(lead: models.Lead) -> dict:
+    """Formato de lead dos eventos SSE (mesmos campos que a UI usa de /api/results)."""
+    return {
+        "id": lead.id, "email": lead.email, "first_name": lead.first_name, "last_name": lead.last_name,
+        "job_title": lead.job_title, "linkedin_url": lead.linkedin_url, "status": lead.status,
+        "confidence_score": lead.confidence_score, "is_saved": bool(lead.is_saved),
+    }
+
+def publish_events(events: List[tuple]):
+    for user_id, domain, event, data in events:
+        event_bus.publish(user_id, domain, event, data)
+
+def publish_new_leads(db: Session, user_id: int, domain: str, emails: List[str]):
+    """Evento 'lead' para cada lead recém-gravado (uma query, só se alguém estiver ouvindo)."""
+    if not emails or not event_bus.watching(user_id, domain):
+        return
+    rows = db.query(models.Lead).filter(models.Lead.user_id == user_id, models.Lead.email.in_(emails)).all()
+    for lead in rows:
+        event_bus.publish(user_id, domain, "lead", lead_payload(lead))
+
+def apply_verification(db: Session, email: str, result) -> List[tuple]:
+    """
+    Re-pontua os leads com este e-mail a partir do resultado SMTP (sem commit).
+    Retorna os eventos 'verification' para publicar depois do commit.
+    """
+    classification = classify_email(email)
+    events = []
+    for lead in db.query(models.Lead).filter(models.Lead.email == email).all():
+        should_save, status_final, confidence = score_lead(lead.job_title, lead.linkedin_url, result.status, classification)
+        watched = event_bus.watching(lead.user_id) and lead.company is not None
+        if not should_save and not lead.is_saved:
+            if watched:
+                events.append((lead.user_id, lead.company.domain, "verification", {"id": lead.id, "email": email, "removed": True}))
+            db.delete(lead) # Genérico que não validou: nem teria sido gravado antes da verificação preguiçosa
+            continue
+        lead.status = status_final
+        lead.confidence_score = confidence
+        if watched:
+            events.append((lead.user_id, lead.company.domain, "verification", lead_payload(lead)))
+    return events
+
+async def write_back_verification(email: str, result):
+    """Chamado pelo scheduler quando uma re-verificação (greylisting/throttle) termina."""
+    db = SessionLocal()
+    try:
+        events = apply_verification(db, email, result)
+        db.commit()
+        publish_events(events)
+        store_results(db, {email: result})
+        print(f"   🔁 RE-VERIFICADO: {email} [{result.status} | SMTP {result.code}]")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao atualizar verificação de {email}: {e}")
+    finally:
+        db.close()
+
+async def verify_backlog_batch(emails: List[str]):
+    """Worker do backlog: cache compartilhado primeiro, depois uma sessão SMTP por MX."""
+    db = SessionLocal()
+    try:
+        results = await verify_emails_cached(db, emails)
+        events, retrying = [], []
+        for email, result in results.items():
+            # Greylisting/throttle: continua 'pending' no banco até a re-verificação terminar
+            # (se o processo cair antes, requeue_pending_leads recoloca o e-mail na fila)
+            if result.is_temp_fail:
+                verification_scheduler.schedule(email, result, write_back_verification)
+                retrying.append(email)
+                continue
+            events.extend(apply_verification(db, email, result))
+        if retrying:
+            db.query(models.Lead).filter(
+                models.Lead.email.in_(retrying), models.Lead.status == "pending"
+            ).update({"verification_queued_at": datetime.datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        publish_events(events)
+        print(f"   ✅ VERIFICADOS EM SEGUNDO PLANO: {len(results)} e-mails")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def requeue_pending_leads():
+    """
+    A fila do backlog e as retentativas do scheduler vivem só na memória: depois de um restart
+    (ou crash), os leads que ficaram 'pending' no banco voltam para o backlog.
+    Só os antigos (PENDING_REQUEUE_AFTER): os recentes estão na fila de algum processo vivo.
+    Os escolhidos são reivindicados com FOR UPDATE SKIP LOCKED + novo verification_queued_at,
+    então workers subindo juntos não recolocam o mesmo lead cada um.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        stale = db.query(models.Lead.id, models.Lead.email).filter(
+            models.Lead.status == "pending",
+            or_(models.Lead.verification_queued_at.is_(None),
+                models.Lead.verification_queued_at < now - PENDING_REQUEUE_AFTER),
+        ).with_for_update(skip_locked=True).all()
+        if stale:
+            db.query(models.Lead).filter(models.Lead.id.in_([row.id for row in stale])).update(
+                {"verification_queued_at": now}, synchronize_session=False)
+        db.commit()
+        emails = list(dict.fromkeys(row.email for row in stale))
+    except Exception as e:
+        db.rollback()
+        print(f"   ⚠️ [BACKLOG] Erro ao buscar leads pendentes: {e}")
+        return
+    finally:
+        db.close()
+    for email in emails:
+        verification_backlog.submit(email)
+    if emails:
+        print(f"   ♻️ [BACKLOG] {len(emails)} e-mails pendentes recolocados na fila de verificação")
+
+def clone_snapshot(db: Session, snapshot: List[dict], company_id: int, user_id: int) -> List[str]:
+    """
+    Materializa o snapshot compartilhado do domínio nas tabelas do usuário: duas queries IN
+    (leads que ele já tem + veredictos de email_verifications) e um único insert em lote.
+    Retorna os e-mails copiados.
+    """
+    candidates = {}
+    for raw in snapshot:
+        classification = classify_email(raw["email"])
+        if classification.rejected:
+            continue
+        candidates.setdefault(classification.email, dict(raw, email=classification.email, classification=classification))
+    if not candidates:
+        return []
+
+    existing = {row.email for row in db.query(models.Lead.email).filter(
+        models.Lead.user_id == user_id,
+        models.Lead.email.in_(list(candidates))
+    )}
+    verdicts = load_fresh(db, [email for email, lead in candidates.items() if lead["role"] not in SITE_ROLES])
+
+    rows, to_verify = [], []
+    for email, lead in candidates.items():
+        if email in existing:
+            continue
+        if lead["role"] in SITE_ROLES:
+            status_validacao = "valid"
+        elif email in verdicts:
+            status_validacao = verdicts[email].status
+        else:
+            status_validacao = "pending" # Veredito expirou (ou nunca saiu): volta para o backlog
+        novo_lead = build_lead(lead, status_validacao, company_id, user_id)
+        if novo_lead is None:
+            continue
+        rows.append(novo_lead)
+        if status_validacao == "pending":
+            to_verify.append(email)
+
+    try:
+        insert_leads(db, rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao copiar snapshot: {e}")
+        return []
+    for email in to_verify:
+        verification_backlog.submit(email)
+    return [row.email for row in rows]
+
+def save_hunt_snapshot(domain: str, leads: List[dict]):
+    """
+    Chamado pelo HuntCoalescer uma vez por caçada, só quando nenhuma fase falhou.
+    Caçada completa vira snapshot para os próximos usuários (vazia não: pode ter sido bloqueio do Bing).
+    """
+    if not leads:
+        return
+    db = SessionLocal()
+    try:
+        save_snapshot(db, domain, leads)
+    finally:
+        db.close()
+
+async def process_domain_scan(domain: str, db: Session, user_id: int, fetch_mode: str = DEFAULT_FETCH_MODE, bypass_cache: bool = False):
     print(f"\n--- INICIANDO VARREDURA PARA {domain} ---")
-    active_scans.add(f"{user_id}_{domain}") # Marca como em andamento
-    
     try:
         # 1. Garante empresa no banco PRO usuario atual
         company = db.query(models.Company).filter(
@@ -143,92 +504,239 @@ async def process_domain_scan(domain: str, db: Session, user_id: int):
             db.commit()
             db.refresh(company)
 
-        # 2. Roda o Hunter (Crawler + Bing)
-        leads_encontrados = await hunt_emails_on_web(domain)
-    
-        # 3. Processa Resultados
-        for lead in leads_encontrados:
-            email = lead["email"]
-            
-            # Evita duplicados no banco
-            exists = db.query(models.Lead).filter(models.Lead.email == email).first()
-            if exists: continue
+        # 2. Alguém já caçou este domínio há pouco: copia o snapshot em vez de caçar de novo
+        if not bypass_cache:
+            snapshot = load_snapshot(db, domain)
+            if snapshot is not None:
+                copied = clone_snapshot(db, snapshot, company.id, user_id)
+                publish_new_leads(db, user_id, domain, copied)
+                print(f"   ⚡ SNAPSHOT: {domain} já caçado recentemente, {len(copied)} leads copiados")
+                return
 
-            # Validação
-            status_validacao = verify_email_realtime(email)
-            confidence = 50
-            should_save = False
+        # 3. Roda o Hunter (Crawler + Bing) em streaming: cada lead é gravado assim que aparece.
+        # A verificação SMTP não segura a varredura: o lead entra como 'pending' e vai para o backlog.
+        # Se o domínio já está sendo caçado (outro usuário), recebe os leads da caçada em andamento.
+        # Os leads são gravados em lotes (um IN + um INSERT por lote), deduplicados por usuário.
+        batch = []
+        def flush_batch():
+            nonlocal batch
+            if not batch:
+                return
+            saved = persist_leads(db, batch, company.id, user_id)
+            for lead in saved:
+                if lead["role"] not in SITE_ROLES:
+                    verification_backlog.submit(lead["email"])
+            publish_new_leads(db, user_id, domain, [lead["email"] for lead in saved])
+            batch = []
 
-            # --- NOVA LÓGICA DE PONTUAÇÃO (SMART SCORING) ---
-            
-            # A. Achado no Site (Crawler) -> Ouro (100%)
-            if lead["role"] in ["Site Oficial", "Página Interna"]:
-                should_save = True
-                confidence = 100
-                status_validacao = "valid"
-
-            # B. Vindo do LinkedIn (Bing/Google) -> Prata (High Confidence)
-            elif lead["linkedin"]:
-                # Se tem LinkedIn e Cargo, é uma pessoa real.
-                # Mesmo que o e-mail seja 'risky' (Catch-All), a existência da pessoa é garantida.
-                should_save = True
-                if status_validacao == "valid":
-                    confidence = 98
-                elif status_validacao == "risky":
-                    confidence = 80 # Catch-All mas com perfil real = Alta chance
-                else:
-                    confidence = 40 # Inválido, mas salvamos como "Baixa" por ter LinkedIn
-
-            # C. Genéricos (só se validar)
-            elif status_validacao != "invalid":
-                should_save = True
-                confidence = 50
-
-            if should_save:
-                nome_parts = lead["name"].split(" ")
-                first = nome_parts[0]
-                last = " ".join(nome_parts[1:]) if len(nome_parts) > 1 else ""
-
-                novo_lead = models.Lead(
-                    email=email,
-                    first_name=first,
-                    last_name=last,
-                    status=status_validacao,
-                    confidence_score=confidence,
-                    company_id=company.id,
-                    user_id=user_id,
-                    linkedin_url=lead["linkedin"],
-                    job_title=lead["role"]
-                )
-                db.add(novo_lead)
-                print(f"   💾 ENCONTRADO/PROCESSADO: {lead['name']} ({email}) [{status_validacao} | {confidence}%]")
-                try:
-                    db.commit()
-                except Exception as e:
-                    db.rollback()
-                    print(f"Erro ao salvar lead: {e}")
+        def on_phase(phase: str):
+            # Fase nova = a anterior acabou: grava o que sobrou dela já (os e-mails do site aparecem
+            # na UI assim que o crawler termina, sem esperar o primeiro lead do Bing/Google)
+            flush_batch()
+            event_bus.publish(user_id, domain, "phase", {"phase": phase})
+
+        async for lead in hunt_coalescer.subscribe(domain, on_phase=on_phase, pool=browser_pool, fetcher=site_fetcher,
+                                                   fetch_mode=fetch_mode, serp_cache=serp_cache, bypass_cache=bypass_cache):
+            # Classificação offline antes de qualquer DNS/SMTP: descartáveis, no-reply e sintaxe ruim param aqui
+            classification = classify_email(lead["email"])
+            if classification.rejected:
+                print(f"   🚫 DESCARTADO [{classification.reason}]: {lead['email']}")
+                continue
+            lead["email"] = classification.email
+            lead["classification"] = classification
+
+            # O lote também fecha ao encher (e a cada troca de fase, em on_phase)
+            batch.append(lead)
+            if len(batch) >= LEAD_FLUSH_SIZE:
+                flush_batch()
+
+        flush_batch()
 
     finally:
-        active_scans.discard(f"{user_id}_{domain}")
         print(f"--- FIM DA VARREDURA ---")
 
+async def run_scan_job(job: models.ScanJob):
+    """Executa um job da fila com sessão própria (nunca a da requisição que enfileirou)."""
+    db = SessionLocal()
+    try:
+        await process_domain_scan(job.domain, db, job.user_id, job.fetch_mode or DEFAULT_FETCH_MODE, bool(job.bypass_cache))
+        if event_bus.watching(job.user_id, job.domain):
+            total = db.query(models.Lead).join(models.Company).filter(
+                models.Company.domain == job.domain,
+                models.Lead.user_id == job.user_id
+            ).count()
+            event_bus.publish(job.user_id, job.domain, "done", {"status": "done", "leads": total})
+    finally:
+        db.close()
+
 @app.post("/api/scan")
-async def start_scan(request: CompanyRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_active_user)):
-    background_tasks.add_task(process_domain_scan, request.domain, db, current_user.id)
-    return {"message": "Busca iniciada.", "domain": request.domain}
+async def start_scan(request: CompanyRequest, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_active_user)):
+    job = enqueue_scan(db, request.domain, current_user.id, request.fetch_mode, request.bypass_cache)
+    scan_workers.notify()
+    return {"message": "Busca iniciada.", "domain": job.domain, "job_id": job.id, "job_status": job.status}
+
+def _company_leads(db: Session, domain: str, user_id: int, after_id: int = 0) -> List[models.Lead]:
+    return db.query(models.Lead).join(models.Company).filter(
+        models.Company.domain == domain,
+        models.Company.user_id == user_id,
+        models.Lead.id > after_id
+    ).order_by(models.Lead.id).all()
+
+def _pending_leads(db: Session, domain: str, user_id: int) -> int:
+    return db.query(models.Lead).join(models.Company).filter(
+        models.Company.domain == domain,
+        models.Company.user_id == user_id,
+        models.Lead.status == "pending"
+    ).count()
+
+def _verification_settled(domain: str, user_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return _pending_leads(db, domain, user_id) == 0
+    finally:
+        db.close()
+
+async def scan_event_source(request: Request, domain: str, user_id: int):
+    """
+    Stream SSE de uma varredura: 'snapshot' com o estado atual, depois 'phase', 'lead',
+    'verification' conforme acontecem e 'done' no fim (o cliente fecha a conexão).
+    'done' só sai quando a caçada acabou e a verificação SMTP dos leads 'pending' também
+    (ou depois de SSE_VERIFY_WAIT segundos esperando por ela): senão o último lote fica como
+    'pending' na UI.
+    """
+    queue = event_bus.subscribe(user_id, domain) # Inscreve antes de ler o banco: nada se perde no meio
+    try:
+        db = SessionLocal()
+        try:
+            leads = _company_leads(db, domain, user_id)
+            scanning = is_scanning(db, domain, user_id)
+            settled = _pending_leads(db, domain, user_id) == 0
+        finally:
+            db.close()
+        sent = {lead.id for lead in leads}
+        last_id = max(sent, default=0)
+        yield format_sse("snapshot", {"is_scanning": scanning, "leads": [lead_payload(lead) for lead in leads]})
+        if not scanning and settled:
+            yield format_sse("done", {"status": "done", "leads": len(leads)})
+            return
+        # Caçada encerrada: a partir daqui só falta a verificação (com prazo)
+        verify_deadline = None if scanning else time.monotonic() + SSE_VERIFY_WAIT
+
+        while True:
+            if await request.is_disconnected():
+                return
+            if verify_deadline is not None and time.monotonic() >= verify_deadline:
+                yield format_sse("done", {"status": "done", "leads": len(sent)})
+                return
+            try:
+                event, data = await asyncio.wait_for(queue.get(), SSE_SYNC_INTERVAL)
+            except asyncio.TimeoutError:
+                # Sem eventos: keepalive + conferência no banco (varredura rodando em outro processo)
+                yield ": keepalive\n\n"
+                db = SessionLocal()
+                try:
+                    fresh = _company_leads(db, domain, user_id, after_id=last_id)
+                    scanning = is_scanning(db, domain, user_id)
+                    settled = _pending_leads(db, domain, user_id) == 0
+                finally:
+                    db.close()
+                for lead in fresh:
+                    last_id = max(last_id, lead.id)
+                    if lead.id not in sent:
+                        sent.add(lead.id)
+                        yield format_sse("lead", lead_payload(lead))
+                if not scanning:
+                    if settled:
+                        yield format_sse("done", {"status": "done", "leads": len(sent)})
+                        return
+                    if verify_deadline is None:
+                        verify_deadline = time.monotonic() + SSE_VERIFY_WAIT
+                continue
+
+            if event == "lead":
+                if data["id"] in sent:
+                    continue
+                sent.add(data["id"])
+                last_id = max(last_id, data["id"])
+            if event == "done":
+                # Fim da caçada: o último lote ainda pode estar na fila de verificação
+                if verify_deadline is None:
+                    verify_deadline = time.monotonic() + SSE_VERIFY_WAIT
+                if _verification_settled(domain, user_id):
+                    yield format_sse(event, data)
+                    return
+                continue
+            yield format_sse(event, data)
+            if event == "verification" and verify_deadline is not None and _verification_settled(domain, user_id):
+                yield format_sse("done", {"status": "done", "leads": len(sent)})
+                return
+    finally:
+        event_bus.unsubscribe(user_id, domain, queue)
+
+@app.get("/api/scan/{domain}/events")
+async def scan_events_stream(domain: str, request: Request, current_user: models.User = Depends(auth.get_current_active_user)):
+    return StreamingResponse(
+        scan_event_source(request, normalize_scan_domain(domain), current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/api/results/{domain}")
 def get_results(domain: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_active_user)):
-    is_scanning = f"{current_user.id}_{domain}" in active_scans
+    domain = normalize_scan_domain(domain) # Mesma chave que enqueue_scan grava em scan_jobs/companies
+    scanning = is_scanning(db, domain, current_user.id)
     company = db.query(models.Company).filter(
         models.Company.domain == domain,
         models.Company.user_id == current_user.id
     ).first()
     
     if not company: 
-        return {"status": "Não iniciado", "is_scanning": is_scanning, "leads": []}
+        return {"status": "Não iniciado", "is_scanning": scanning, "leads": []}
         
-    return {"status": "Encontrado", "is_scanning": is_scanning, "leads": company.leads}
+    return {"status": "Encontrado", "is_scanning": scanning, "leads": company.leads}
+
+@app.get("/api/admin/cache-stats")
+def cache_stats(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return {
+        "serp": {**serp_cache.stats, "hit_rate": round(serp_cache.hit_rate(), 3)},
+        "mx": {**mx_cache.stats, "hit_rate": round(mx_cache.hit_rate(), 3)},
+        "catch_all": {**catchall_cache.stats, "hit_rate": round(catchall_cache.hit_rate(), 3)},
+        "verifications": dict(verification_cache.stats),
+        "classifier": dict(email_classifier.stats),
+        "retries": {**verification_scheduler.stats, "pending": verification_scheduler.pending()},
+        "backlog": {**verification_backlog.stats, "pending": verification_backlog.pending()},
+        "scan_jobs": dict(scan_workers.stats),
+        "hunts": dict(hunt_coalescer.stats),
+        "snapshots": dict(domain_snapshots.stats),
+        "sse": dict(event_bus.stats),
+    }
+
+@app.post("/api/verify/bulk")
+async def verify_bulk(request: Request, current_user: models.User = Depends(auth.get_current_active_user)):
+    """
+    Verificação em massa (lista importada / CRM). Aceita upload multipart (campo `file`,
+    .txt/.csv com um e-mail por linha ou separados por vírgula) ou JSON {"emails": [...]}.
+    Responde em NDJSON, uma linha por e-mail assim que o resultado fica pronto.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Envie o arquivo no campo 'file'")
+        refresh = str(form.get("refresh", "")).lower() in ("1", "true", "on")
+        emails = emails_from_upload(upload)
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON inválido")
+        if not isinstance(payload, dict) or not isinstance(payload.get("emails"), list):
+            raise HTTPException(status_code=400, detail="Informe a lista em 'emails'")
+        refresh = bool(payload.get("refresh", False))
+        emails = emails_from_list(payload["emails"])
+
+    return StreamingResponse(ndjson_results(emails, refresh=refresh), media_type="application/x-ndjson")
 
 @app.post("/api/leads/{id}/save")
 def save_lead_manually(id: int, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_active_user)):
@@ -244,8 +752,86 @@ def save_lead_manually(id: int, db: Session = Depends(get_db), current_user: mod
     db.commit()
     return {"status": "success", "is_saved": True}
 
+def js_string(value: str) -> str:
+    """Literal de string JS seguro dentro de <script> (aspas via json, e '</script>' não fecha a tag)."""
+    return json.dumps(value).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+# JS da página /view/{domain} enquanto a varredura roda (consome /api/scan/{domain}/events)
+LIVE_RESULTS_SCRIPT = """
+        <script>
+            const DOT_CLASSES = { valid: 'dot-green', risky: 'dot-yellow', pending: 'dot-gray' };
+            const PHASE_LABELS = { site: 'Lendo o site...', bing: 'Buscando no Bing...', google: 'Buscando no Google...', done: 'Verificando e-mails...' };
+            const leadsBody = document.getElementById('leads-body');
+            const scanStatus = document.getElementById('scan-status');
+
+            function esc(value) {
+                const div = document.createElement('div');
+                div.innerText = value == null ? '' : String(value);
+                return div.innerHTML;
+            }
+
+            function statusDot(status) {
+                const title = status === 'pending' ? ' title="Verificando..."' : '';
+                return `<span class="dot ${DOT_CLASSES[status] || 'dot-red'}"${title}></span>`;
+            }
+
+            function upsertLead(lead) {
+                if (leadsBody.querySelector(`tr[data-lead-id="${lead.id}"]`)) return;
+                const emptyRow = document.getElementById('empty-row');
+                if (emptyRow) emptyRow.remove();
+                const linkedin = lead.linkedin_url
+                    ? `<a href="${esc(lead.linkedin_url)}" target="_blank" class="linkedin-btn"><i class="fab fa-linkedin-in"></i></a>`
+                    : '<span class="no-link">-</span>';
+                const action = lead.is_saved
+                    ? '<span class="badge conf-high">Adicionado</span>'
+                    : `<button class="add-btn" onclick="saveLead(${lead.id}, this)"><i class="fas fa-plus"></i> Adicionar</button>`;
+                const row = document.createElement('tr');
+                row.dataset.leadId = lead.id;
+                row.innerHTML = `
+                    <td>
+                        <div class="user-info">
+                            <div class="avatar">${esc((lead.first_name || '?')[0].toUpperCase())}</div>
+                            <div>
+                                <div class="name">${esc(lead.first_name)} ${esc(lead.last_name)}</div>
+                                <div class="role">${esc(lead.job_title)}</div>
+                            </div>
+                        </div>
+                    </td>
+                    <td>
+                        <div style="display: flex; align-items: center; gap: 8px;">
+                            ${statusDot(lead.status)}
+                            <span class="email">${esc(lead.email)}</span>
+                        </div>
+                    </td>
+                    <td>${linkedin}</td>
+                    <td style="text-align: right;">${action}</td>`;
+                leadsBody.appendChild(row);
+            }
+
+            const source = new EventSource('/api/scan/' + encodeURIComponent(__DOMAIN__) + '/events');
+            source.addEventListener('snapshot', e => JSON.parse(e.data).leads.forEach(upsertLead));
+            source.addEventListener('lead', e => upsertLead(JSON.parse(e.data)));
+            source.addEventListener('verification', e => {
+                const data = JSON.parse(e.data);
+                const row = leadsBody.querySelector(`tr[data-lead-id="${data.id}"]`);
+                if (!row) return;
+                if (data.removed) { row.remove(); return; }
+                row.querySelector('.dot').outerHTML = statusDot(data.status);
+            });
+            source.addEventListener('phase', e => {
+                const phase = JSON.parse(e.data).phase;
+                if (scanStatus && PHASE_LABELS[phase]) scanStatus.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${PHASE_LABELS[phase]}`;
+            });
+            source.addEventListener('done', () => {
+                source.close(); // Senão o EventSource reconecta sozinho
+                if (scanStatus) scanStatus.remove();
+            });
+        </script>
+"""
+
 @app.get("/view/{domain}", response_class=HTMLResponse)
 def view_results(domain: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_active_user)):
+    domain = normalize_scan_domain(domain) # Mesma chave que enqueue_scan grava em scan_jobs/companies
     admin_btn = '<a href="/admin/users" class="menu-item"><i class="fas fa-users-cog"></i> Admin Painel</a>' if current_user.role == "admin" else ""
     company = db.query(models.Company).filter(
         models.Company.domain == domain,
@@ -256,7 +842,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
     if not company.leads:
         # Estado Vazio (Nenhum e-mail encontrado)
         leads_rows = """
-        <tr>
+        <tr id="empty-row">
             <td colspan="4" style="text-align: center; color: #64748b; padding: 40px 0;">
                 <i class="fas fa-search-minus" style="font-size: 24px; color: #cbd5e1; margin-bottom: 10px; display: block;"></i>
                 Nenhum e-mail encontrado
@@ -277,6 +863,9 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
             elif lead.status == "risky": 
                 conf_class = "conf-med"
                 status_dot = '<span class="dot dot-yellow"></span>'
+            elif lead.status == "pending":
+                conf_class = "conf-med"
+                status_dot = '<span class="dot dot-gray" title="Verificando..."></span>'
 
             # Avatar Color Hash
             initials = lead.first_name[0].upper() if lead.first_name else "?"
@@ -288,7 +877,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
                 add_action_html = f'<button class="add-btn" onclick="saveLead({lead.id}, this)"><i class="fas fa-plus"></i> Adicionar</button>'
             
             leads_rows += f"""
-            <tr>
+            <tr data-lead-id="{lead.id}">
                 <td>
                     <div class="user-info">
                         <div class="avatar">{initials}</div>
@@ -309,6 +898,11 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
             </tr>
             """
     
+    # Varredura em andamento: a página recebe leads e verificações por SSE, sem recarregar
+    scanning = is_scanning(db, domain, current_user.id)
+    scan_badge = '<span id="scan-status" class="badge conf-med" style="margin-left: 12px;"><i class="fas fa-spinner fa-spin"></i> Buscando...</span>' if scanning else ""
+    live_script = LIVE_RESULTS_SCRIPT.replace("__DOMAIN__", js_string(domain)) if scanning else ""
+
     html_template = f"""
     <!DOCTYPE html>
     <html lang="pt-br">
@@ -470,6 +1064,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
             .dot-green {{ background-color: #10b981; }}
             .dot-yellow {{ background-color: #f59e0b; }}
             .dot-red {{ background-color: #ef4444; }}
+            .dot-gray {{ background-color: #94a3b8; }}
 
             /* Labels (Tags) e Botões */
             .badge {{ 
@@ -521,7 +1116,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
 
         <div class="main-content">
             <div class="top-header">
-                <div><i class="fas fa-search"></i> Explorador / {domain}</div>
+                <div><i class="fas fa-search"></i> Explorador / {domain}{scan_badge}</div>
             </div>
             
             <div class="content-area">
@@ -537,7 +1132,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
                                 <th style="text-align: right;">Etiquetas / Ação</th>
                             </tr>
                         </thead>
-                        <tbody>
+                        <tbody id="leads-body">
                             {leads_rows}
                         </tbody>
                     </table>
@@ -566,6 +1161,7 @@ def view_results(domain: str, db: Session = Depends(get_db), current_user: model
                 }}
             }}
         </script>
+        {live_script}
     </body>
     </html>
     """
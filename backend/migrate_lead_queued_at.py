@@ -0,0 +1,32 @@
+from sqlalchemy import text
+from database import SessionLocal
+
+# Migração: coluna leads.verification_queued_at, usada pelo startup para recolocar na fila
+# só os leads 'pending' antigos (os recentes estão na memória de algum processo vivo).
+# Linhas existentes ficam NULL = tratadas como antigas na primeira subida.
+
+def run_migration():
+    db = SessionLocal()
+    try:
+        try:
+            db.execute(text("ALTER TABLE leads ADD COLUMN verification_queued_at DATETIME NULL;"))
+            print("  [+] Coluna verification_queued_at adicionada em leads.")
+        except Exception as e:
+            print(f"  [~] Aviso: verification_queued_at {e}")
+
+        try:
+            db.execute(text("CREATE INDEX ix_leads_verification_queued_at ON leads (verification_queued_at);"))
+            print("  [+] Índice ix_leads_verification_queued_at criado.")
+        except Exception as e:
+            print(f"  [~] Aviso: ix_leads_verification_queued_at {e}")
+
+        db.commit()
+        print("[*] SUCESSO: leads prontos para o requeue por idade.")
+    except Exception as e:
+        db.rollback()
+        print(f"ERRO FATAL: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,34 @@
+from sqlalchemy import text
+from database import SessionLocal
+
+# Migração: trava UNIQUE (user_id, email) em leads, usada pelo insert em lote da varredura.
+# Antes remove as duplicatas por usuário, mantendo a salva no CRM (ou a mais antiga).
+
+def run_migration():
+    db = SessionLocal()
+    try:
+        result = db.execute(text("""
+            DELETE l FROM leads l
+            JOIN leads keep
+              ON keep.user_id = l.user_id AND keep.email = l.email
+             AND (COALESCE(keep.is_saved, 0) > COALESCE(l.is_saved, 0)
+                  OR (COALESCE(keep.is_saved, 0) = COALESCE(l.is_saved, 0) AND keep.id < l.id))
+        """))
+        print(f"  [+] {result.rowcount} leads duplicados removidos.")
+
+        try:
+            db.execute(text("ALTER TABLE leads ADD CONSTRAINT uq_leads_user_email UNIQUE (user_id, email);"))
+            print("  [+] Trava UNIQUE (user_id, email) criada em leads.")
+        except Exception as e:
+            print(f"  [~] Aviso: uq_leads_user_email {e}")
+
+        db.commit()
+        print("[*] SUCESSO: leads sem duplicatas por usuário.")
+    except Exception as e:
+        db.rollback()
+        print(f"ERRO FATAL: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_migration()
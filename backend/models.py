@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -31,6 +31,8 @@ class Company(Base):
 
 class Lead(Base):
     __tablename__ = "leads"
+    # Um e-mail por usuário: inserts em lote usam upsert e não duplicam em corridas (migrate_lead_unique.py)
+    __table_args__ = (UniqueConstraint("user_id", "email", name="uq_leads_user_email"),)
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(100))
@@ -39,7 +41,9 @@ class Lead(Base):
     job_title = Column(String(150))      # Cargo
     linkedin_url = Column(String(500))   # Link do perfil
     confidence_score = Column(Integer)   # 0 a 100%
-    status = Column(String(50))          # valid, invalid, risky
+    status = Column(String(50))          # valid, invalid, risky, pending (na fila de verificação)
+    # Quando o lead entrou (ou voltou) na fila de verificação: só 'pending' antigo é recolocado no startup
+    verification_queued_at = Column(DateTime, nullable=True, index=True)
     is_saved = Column(Boolean, default=False) # Adição manual (botão +)
     saved_at = Column(DateTime, nullable=True) # Data em que foi salvo no CRM
     
@@ -48,4 +52,42 @@ class Lead(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     
     company = relationship("Company", back_populates="leads")
-    owner = relationship("User", back_populates="leads")
\ No newline at end of file
+    owner = relationship("User", back_populates="leads")
+
+class EmailVerification(Base):
+    """Cache compartilhado (entre usuários) do resultado SMTP de cada endereço."""
+    __tablename__ = "email_verifications"
+
+    email = Column(String(255), primary_key=True)
+    status = Column(String(50), nullable=False)     # valid, invalid, risky
+    smtp_code = Column(Integer, nullable=True)      # Código do RCPT (None = não chegou a perguntar)
+    is_catch_all = Column(Boolean, nullable=True)
+    mx_host = Column(String(255), nullable=True)
+    checked_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class ScanJob(Base):
+    """Fila durável de varreduras (sobrevive a restart e é visível para todos os workers do uvicorn)."""
+    __tablename__ = "scan_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    domain = Column(String(255), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String(20), default="queued", index=True)  # queued, running, done, failed
+    fetch_mode = Column(String(20))
+    bypass_cache = Column(Boolean, default=False)
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True) # Worker que sumir perde o job quando o lease vence
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+class DomainSnapshot(Base):
+    """Saída crua da última caçada de cada domínio, compartilhada entre usuários (veredictos em email_verifications)."""
+    __tablename__ = "domain_snapshots"
+
+    domain = Column(String(255), primary_key=True)
+    leads_json = Column(Text(length=16777215), nullable=False) # MEDIUMTEXT: lista de {name, email, linkedin, role, phase}
+    lead_count = Column(Integer, default=0)
+    hunted_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
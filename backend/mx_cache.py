@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+# Limites do TTL respeitado (segundos). TTLs absurdamente baixos/altos são grampeados.
+MX_MIN_TTL = int(os.getenv("MX_MIN_TTL", "60"))
+MX_MAX_TTL = int(os.getenv("MX_MAX_TTL", str(24 * 3600)))
+# Respostas negativas (NXDOMAIN / sem MX) ficam pouco tempo para não esconder correções de DNS
+MX_NEGATIVE_TTL = int(os.getenv("MX_NEGATIVE_TTL", "300"))
+
+
+class MxLookupError(Exception):
+    """Falha transitória de DNS (timeout, SERVFAIL): não diz nada sobre o domínio ter ou não e-mail."""
+    pass
+
+
+class MxCache:
+    """
+    Cache em memória de registros MX, compartilhado entre varreduras.
+    - Respeita o TTL do DNS (grampeado entre MX_MIN_TTL e MX_MAX_TTL)
+    - Guarda respostas negativas por MX_NEGATIVE_TTL
+    - Mantém a lista completa de MX ordenada por preferência
+    - Consultas simultâneas ao mesmo domínio viram uma só (single-flight)
+    """
+    def __init__(self, min_ttl: int = MX_MIN_TTL, max_ttl: int = MX_MAX_TTL, negative_ttl: int = MX_NEGATIVE_TTL):
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "negative_hits": 0, "coalesced": 0, "misses": 0, "lookups": 0, "errors": 0}
+
+    def get(self, domain: str) -> Optional[List[str]]:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        expires_at, hosts = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[domain]
+            return None
+        return hosts
+
+    async def resolve(self, domain: str) -> List[str]:
+        """
+        Lista de hosts MX em ordem de preferência. Lista vazia = domínio sem e-mail (NXDOMAIN / sem MX).
+        Levanta MxLookupError quando o DNS não respondeu (nada é cacheado nesse caso).
+        """
+        domain = domain.lower().rstrip(".")
+        hosts = self.get(domain)
+        if hosts is not None:
+            self.stats["hits" if hosts else "negative_hits"] += 1
+            return hosts
+
+        inflight = self._inflight.get(domain)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[domain] = future
+        try:
+            hosts = await self._lookup(domain)
+            future.set_result(hosts)
+            return hosts
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Evita "exception was never retrieved" se ninguém mais esperava
+            raise
+        finally:
+            del self._inflight[domain]
+
+    async def _lookup(self, domain: str) -> List[str]:
+        self.stats["lookups"] += 1
+        try:
+            answer = await dns.asyncresolver.resolve(domain, 'MX')
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            self._store(domain, [], self.negative_ttl)
+            return []
+        except dns.exception.DNSException as e:
+            # Timeout, SERVFAIL (NoNameservers) e afins: falha transitória, não vai para o cache
+            self.stats["errors"] += 1
+            raise MxLookupError(f"{type(e).__name__}: {e}") from e
+
+        records = sorted(answer, key=lambda r: r.preference)
+        hosts = [str(r.exchange).rstrip(".") for r in records if str(r.exchange) not in (".", "")]
+        ttl = answer.rrset.ttl if answer.rrset is not None else self.min_ttl
+        self._store(domain, hosts, ttl if hosts else self.negative_ttl)
+        return hosts
+
+    def _store(self, domain: str, hosts: List[str], ttl: int):
+        if hosts:
+            ttl = max(self.min_ttl, min(self.max_ttl, ttl))
+        self._entries[domain] = (time.monotonic() + ttl, hosts)
+
+    def hit_rate(self) -> float:
+        # Quem pegou carona numa consulta em andamento também não pagou DNS
+        hits = self.stats["hits"] + self.stats["negative_hits"] + self.stats["coalesced"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Instância única do processo (todas as varreduras compartilham)
+mx_cache = MxCache()
@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import datetime
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from browser_pool import BrowserPool
+
+# Gravação/replay do tráfego do browser do hunter, para benchmarks e regressões offline.
+# Formato do arquivo (recordings/<dominio>.json):
+#   {"domain": ..., "recorded_at": ..., "entries": [{"method", "url", "status", "headers", "body"(base64)}]}
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+# Cabeçalhos que não fazem sentido reenviar (o corpo já vem descomprimido do Playwright)
+_SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def recording_path(domain: str, directory: str = RECORDINGS_DIR) -> str:
+    return os.path.join(directory, f"{domain}.json")
+
+
+def load_archive(domain: str, directory: str = RECORDINGS_DIR) -> Dict:
+    with open(recording_path(domain, directory), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RecordingPool(BrowserPool):
+    """BrowserPool que grava toda resposta recebida pelos contextos num arquivo por domínio."""
+    def __init__(self, domain: str, directory: str = RECORDINGS_DIR, **pool_kwargs):
+        pool_kwargs.setdefault("health_interval", 0)
+        super().__init__(**pool_kwargs)
+        self.domain = domain
+        self.directory = directory
+        self.entries: Dict[str, Dict] = {}
+        self._pending = set()
+
+    async def _capture(self, response):
+        key = f"{response.request.method} {response.url}"
+        if key in self.entries:
+            return
+        try:
+            body = await response.body()
+        except Exception:
+            body = b""  # Redirects e respostas abortadas não têm corpo
+        self.entries[key] = {
+            "method": response.request.method,
+            "url": response.url,
+            "status": response.status,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS},
+            "body": base64.b64encode(body).decode("ascii"),
+        }
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        async with super().context(**context_kwargs) as context:
+            def on_response(response):
+                task = asyncio.create_task(self._capture(response))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+            context.on("response", on_response)
+            try:
+                yield context
+            finally:
+                if self._pending:
+                    await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def save(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = recording_path(self.domain, self.directory)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "domain": self.domain,
+                "recorded_at": datetime.datetime.utcnow().isoformat(),
+                "entries": list(self.entries.values()),
+            }, f)
+        return path
+
+
+class ReplayPool(BrowserPool):
+    """
+    BrowserPool que serve as respostas de um arquivo gravado via roteamento do Playwright,
+    sem tocar na rede. `latency_ms` simula o tempo de resposta de cada requisição.
+    Requisições que não estão no arquivo são abortadas (como um site fora do ar).
+    """
+    def __init__(self, archive: Dict, latency_ms: float = 0, **pool_kwargs):
+        pool_kwargs.setdefault("health_interval", 0)
+        super().__init__(**pool_kwargs)
+        self.latency = latency_ms / 1000
+        self.entries = {f"{e['method']} {e['url']}": e for e in archive["entries"]}
+        self.stats = {**self.stats, "replayed": 0, "missing": 0}
+
+    def _lookup(self, method: str, url: str) -> Optional[Dict]:
+        entry = self.entries.get(f"{method} {url}")
+        if entry is None and url.endswith("/"):
+            entry = self.entries.get(f"{method} {url[:-1]}")
+        elif entry is None:
+            entry = self.entries.get(f"{method} {url}/")
+        return entry
+
+    async def _serve(self, route):
+        request = route.request
+        entry = self._lookup(request.method, request.url)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            if entry is None:
+                self.stats["missing"] += 1
+                await route.abort("internetdisconnected")
+                return
+            self.stats["replayed"] += 1
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=base64.b64decode(entry["body"]))
+        except Exception:
+            pass  # Página fechada no meio do replay
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        async with super().context(**context_kwargs) as context:
+            # Registrado antes do InterceptionProfile do hunter: ele bloqueia primeiro
+            # e repassa (fallback) o resto para cá.
+            await context.route("**/*", self._serve)
+            yield context
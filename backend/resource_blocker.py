@@ -0,0 +1,109 @@
+import urllib.parse
+from typing import Dict, Iterable, Optional
+
+# O hunter só lê page.content(), page.title() e âncoras: o resto é banda desperdiçada.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# Hosts de analytics/ads/trackers (casados por sufixo: "www.google-analytics.com" também cai)
+BLOCKED_HOSTS = frozenset({
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com",
+    "googleadservices.com", "doubleclick.net", "adservice.google.com",
+    "facebook.net", "connect.facebook.net", "hotjar.com", "clarity.ms",
+    "bat.bing.com", "analytics.tiktok.com", "snap.licdn.com", "px.ads.linkedin.com",
+    "rdstation.com.br", "d335luupugsy2.cloudfront.net", "hubspot.com", "hs-analytics.net",
+    "hs-scripts.com", "intercom.io", "zendesk.com", "tawk.to", "jivosite.com",
+    "criteo.com", "taboola.com", "outbrain.com", "adnxs.com", "scorecardresearch.com",
+    "newrelic.com", "nr-data.net", "sentry.io", "segment.io", "mixpanel.com",
+})
+
+# Tamanho médio (bytes) por tipo, usado só para ESTIMAR o que deixamos de baixar
+_AVG_BLOCKED_BYTES = {
+    "image": 40_000, "media": 500_000, "font": 30_000,
+    "stylesheet": 20_000, "script": 25_000,
+}
+
+# Ajustes por fase do hunter. Chaves aceitas: "blocked_types", "blocked_hosts", "enabled".
+DEFAULT_PHASE_OVERRIDES: Dict[str, Dict] = {
+    "site": {},
+    "serp": {},
+}
+
+
+class InterceptionProfile:
+    """
+    Perfil de interceptação de requisições instalado no BrowserContext do hunter.
+    Aborta tipos de recurso desnecessários e hosts de tracking, com ajustes por fase
+    (set_phase) e contadores de bytes bloqueados (estimados) vs permitidos (medidos).
+    """
+    def __init__(self, blocked_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 blocked_hosts: Iterable[str] = BLOCKED_HOSTS,
+                 phase_overrides: Optional[Dict[str, Dict]] = None,
+                 enabled: bool = True):
+        self.base = {
+            "blocked_types": frozenset(blocked_types),
+            "blocked_hosts": frozenset(blocked_hosts),
+            "enabled": enabled,
+        }
+        self.phase_overrides = phase_overrides if phase_overrides is not None else DEFAULT_PHASE_OVERRIDES
+        self.phase = None
+        self._active = self.base
+        self.stats = {
+            "blocked_requests": 0, "allowed_requests": 0,
+            "blocked_bytes_estimate": 0, "allowed_bytes": 0,
+            "blocked_by_type": {},
+        }
+
+    def set_phase(self, phase: str):
+        """Troca o conjunto de regras ativo (ex: "site" na Fase 1, "serp" nas Fases 2/3)."""
+        self.phase = phase
+        self._active = {**self.base, **self.phase_overrides.get(phase, {})}
+
+    async def install(self, context):
+        await context.route("**/*", self._handle_route)
+        context.on("requestfinished", self._on_request_finished)
+
+    def _host_is_blocked(self, url: str) -> bool:
+        host = urllib.parse.urlparse(url).hostname or ""
+        labels = host.split(".")
+        blocked_hosts = self._active["blocked_hosts"]
+        return any(".".join(labels[i:]) in blocked_hosts for i in range(len(labels) - 1))
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if not self._active["enabled"]:
+            return False
+        # Documento é a página que o hunter mandou abrir: bloquear quebraria a caçada de
+        # empresas que estão na própria lista (rdstation.com.br, hubspot.com, zendesk.com...)
+        if resource_type == "document":
+            return False
+        if resource_type in self._active["blocked_types"]:
+            return True
+        return self._host_is_blocked(url)
+
+    async def _handle_route(self, route):
+        request = route.request
+        try:
+            if self.should_block(request.resource_type, request.url):
+                self.stats["blocked_requests"] += 1
+                self.stats["blocked_bytes_estimate"] += _AVG_BLOCKED_BYTES.get(request.resource_type, 10_000)
+                by_type = self.stats["blocked_by_type"]
+                by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+                await route.abort()
+            else:
+                self.stats["allowed_requests"] += 1
+                # fallback() deixa outros handlers (ex: replay offline) atenderem antes da rede
+                await route.fallback()
+        except Exception:
+            # Página fechada no meio da requisição: nada a fazer
+            pass
+
+    async def _on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+            self.stats["allowed_bytes"] += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            pass
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['blocked_requests']} bloqueadas (~{s['blocked_bytes_estimate'] // 1024} KB) / "
+                f"{s['allowed_requests']} permitidas ({s['allowed_bytes'] // 1024} KB)")
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+from typing import Dict, Set, Tuple
+
+# Pub/sub em memória dos eventos de varredura (SSE em /api/scan/{domain}/events).
+# Chave = (user_id, domínio normalizado). Eventos: phase, lead, verification, done.
+# Só alcança quem está conectado a este processo; o endpoint SSE complementa lendo o banco
+# de tempos em tempos (leads de varreduras que rodaram em outro worker do uvicorn).
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "1000"))
+
+Key = Tuple[int, str]
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class ScanEventBus:
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Key, Set[asyncio.Queue]] = {}
+        self._users: Dict[int, int] = {}
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+    def subscribe(self, user_id: int, domain: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault((user_id, domain), set()).add(queue)
+        self._users[user_id] = self._users.get(user_id, 0) + 1
+        return queue
+
+    def unsubscribe(self, user_id: int, domain: str, queue: asyncio.Queue):
+        queues = self._subscribers.get((user_id, domain))
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[(user_id, domain)]
+        self._users[user_id] -= 1
+        if not self._users[user_id]:
+            del self._users[user_id]
+
+    def watching(self, user_id: int, domain: str = None) -> bool:
+        """Alguém está ouvindo? Evita montar payloads (e queries) para ninguém."""
+        if domain is None:
+            return user_id in self._users
+        return (user_id, domain) in self._subscribers
+
+    def publish(self, user_id: int, domain: str, event: str, data):
+        queues = self._subscribers.get((user_id, domain))
+        if not queues:
+            return
+        self.stats["published"] += 1
+        for queue in queues:
+            try:
+                queue.put_nowait((event, data))
+                self.stats["delivered"] += 1
+            except asyncio.QueueFull:
+                # Cliente travado: o próximo sync com o banco recupera os leads
+                self.stats["dropped"] += 1
+
+
+# Instância única do processo
+event_bus = ScanEventBus()
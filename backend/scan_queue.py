@@ -0,0 +1,204 @@
+import asyncio
+import datetime
+import os
+import socket
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, aliased
+
+import models
+from browser_pool import POOL_MAX_CONTEXTS
+from database import SessionLocal
+from hunt_coalescer import normalize_scan_domain
+
+# Fila durável de varreduras na tabela scan_jobs. Qualquer processo do uvicorn pode enfileirar;
+# os workers pegam jobs com SELECT ... FOR UPDATE SKIP LOCKED e mantêm um lease renovado.
+# Job "running" com lease vencido = worker morreu (restart, crash): outro worker retoma.
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", str(POOL_MAX_CONTEXTS))) # Uma varredura por contexto do Chromium
+SCAN_LEASE_SECONDS = int(os.getenv("SCAN_LEASE_SECONDS", "120"))
+SCAN_MAX_ATTEMPTS = int(os.getenv("SCAN_MAX_ATTEMPTS", "3"))
+SCAN_POLL_INTERVAL = float(os.getenv("SCAN_POLL_INTERVAL", "2"))
+
+RunJob = Callable[[models.ScanJob], Awaitable[None]]
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def _active_filter(now: datetime.datetime):
+    """queued, ou running com lease válido (running vencido é job abandonado, não varredura ativa)."""
+    return or_(
+        models.ScanJob.status == "queued",
+        and_(models.ScanJob.status == "running", models.ScanJob.lease_expires_at > now),
+    )
+
+
+def enqueue_scan(db: Session, domain: str, user_id: int, fetch_mode: str, bypass_cache: bool = False) -> models.ScanJob:
+    """Cria o job (ou devolve o que já está na fila/rodando para o mesmo usuário e domínio)."""
+    domain = normalize_scan_domain(domain)
+    existing = db.query(models.ScanJob).filter(
+        models.ScanJob.domain == domain,
+        models.ScanJob.user_id == user_id,
+        _active_filter(_now()),
+    ).first()
+    if existing:
+        return existing
+    job = models.ScanJob(domain=domain, user_id=user_id, status="queued", fetch_mode=fetch_mode,
+                         bypass_cache=bypass_cache, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def is_scanning(db: Session, domain: str, user_id: int) -> bool:
+    return db.query(models.ScanJob.id).filter(
+        models.ScanJob.domain == normalize_scan_domain(domain),
+        models.ScanJob.user_id == user_id,
+        _active_filter(_now()),
+    ).first() is not None
+
+
+class ScanWorkerPool:
+    """
+    Workers que consomem scan_jobs. Cada job roda com sessão própria (o `run_job` abre a dele),
+    no máximo `workers` varreduras por processo, com lease renovado enquanto roda.
+    Falha: volta para a fila até SCAN_MAX_ATTEMPTS tentativas, depois fica 'failed'.
+    """
+    def __init__(self, run_job: RunJob, workers: int = SCAN_WORKERS, lease_seconds: int = SCAN_LEASE_SECONDS,
+                 max_attempts: int = SCAN_MAX_ATTEMPTS, poll_interval: float = SCAN_POLL_INTERVAL):
+        self.run_job = run_job
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runners: List[asyncio.Task] = []
+        self._running_jobs = {}
+        self.stats = {"claimed": 0, "done": 0, "failed": 0, "retried": 0, "resumed": 0}
+
+    async def start(self):
+        if not self._runners:
+            self._wakeup = asyncio.Event()
+            self._runners = [asyncio.create_task(self._run(f"{self.worker_prefix}:{i}")) for i in range(self.workers)]
+
+    async def stop(self):
+        for runner in self._runners:
+            runner.cancel()
+        for runner in self._runners:
+            try:
+                await runner
+            except asyncio.CancelledError:
+                pass
+        self._runners = []
+        # Devolve para a fila o que estava rodando: o próximo processo retoma na hora, sem esperar o lease
+        if self._running_jobs:
+            self._update(list(self._running_jobs), status="queued", worker_id=None, lease_expires_at=None)
+            self._running_jobs.clear()
+
+    def notify(self):
+        """Acorda os workers deste processo (job recém-enfileirado não espera o polling)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _update(self, job_ids, **values):
+        db = SessionLocal()
+        try:
+            db.query(models.ScanJob).filter(models.ScanJob.id.in_(job_ids)).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"   ⚠️ [SCAN QUEUE] Erro ao atualizar jobs {job_ids}: {e}")
+        finally:
+            db.close()
+
+    def _claim(self, worker_id: str) -> Optional[models.ScanJob]:
+        db = SessionLocal()
+        try:
+            now = _now()
+            # Domínio já sendo caçado por OUTRO processo: espera lá terminar em vez de caçar em dobro.
+            # No mesmo processo pode pegar, a caçada é compartilhada pelo HuntCoalescer.
+            other = aliased(models.ScanJob)
+            busy_elsewhere = db.query(other.id).filter(
+                other.domain == models.ScanJob.domain,
+                other.status == "running",
+                other.lease_expires_at > now,
+                ~other.worker_id.like(f"{self.worker_prefix}:%"),
+            ).exists()
+            job = db.query(models.ScanJob).filter(or_(
+                and_(models.ScanJob.status == "queued", ~busy_elsewhere),
+                and_(models.ScanJob.status == "running", models.ScanJob.lease_expires_at <= now),
+            )).order_by(models.ScanJob.id).with_for_update(skip_locked=True).first()
+            if job is None:
+                db.commit()
+                return None
+            if job.status == "running":
+                self.stats["resumed"] += 1
+                print(f"   ♻️ [SCAN QUEUE] Retomando job abandonado #{job.id} ({job.domain}) de {job.worker_id}")
+            if job.attempts >= self.max_attempts:
+                job.status = "failed"
+                job.finished_at = now
+                job.error = job.error or "Tentativas esgotadas (worker caiu durante a varredura)"
+                db.commit()
+                self.stats["failed"] += 1
+                return self._claim(worker_id)
+            job.status = "running"
+            job.attempts += 1
+            job.worker_id = worker_id
+            job.started_at = now
+            job.lease_expires_at = now + datetime.timedelta(seconds=self.lease_seconds)
+            db.commit()
+            db.refresh(job)
+            db.expunge(job)
+            self.stats["claimed"] += 1
+            return job
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self._update([job_id], lease_expires_at=_now() + datetime.timedelta(seconds=self.lease_seconds))
+
+    async def _run(self, worker_id: str):
+        while True:
+            try:
+                job = self._claim(worker_id)
+            except Exception as e:
+                print(f"   ⚠️ [SCAN QUEUE] Erro ao buscar job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: models.ScanJob):
+        self._running_jobs[job.id] = job
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            await self.run_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            del self._running_jobs[job.id]
+            retry = job.attempts < self.max_attempts
+            self.stats["retried" if retry else "failed"] += 1
+            print(f"   ❌ [SCAN QUEUE] Job #{job.id} ({job.domain}) falhou na tentativa {job.attempts}: {e}")
+            self._update([job.id], status="queued" if retry else "failed", error=str(e)[:2000],
+                         worker_id=None, lease_expires_at=None, finished_at=None if retry else _now())
+        else:
+            del self._running_jobs[job.id]
+            self.stats["done"] += 1
+            self._update([job.id], status="done", error=None, lease_expires_at=None, finished_at=_now())
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,91 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Cache em disco dos SERPs já parseados: (buscador, query normalizada) -> [(href, título), ...]
+SERP_CACHE_PATH = os.getenv("SERP_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "serp_cache.sqlite3"))
+SERP_CACHE_TTL = int(os.getenv("SERP_CACHE_TTL", str(7 * 24 * 3600)))   # 7 dias
+SERP_CACHE_MAX_ENTRIES = int(os.getenv("SERP_CACHE_MAX_ENTRIES", "5000"))
+
+
+def normalize_query(query: str) -> str:
+    """Mesma busca com caixa/espaços diferentes cai na mesma chave."""
+    return " ".join(query.lower().split())
+
+
+class SerpCache:
+    """
+    Cache persistente (SQLite) de resultados de busca, com TTL e despejo LRU por tamanho.
+    As operações são locais e de sub-milissegundo, então rodam direto no event loop.
+    """
+    def __init__(self, path: str = SERP_CACHE_PATH, ttl: int = SERP_CACHE_TTL, max_entries: int = SERP_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS serp_results (
+                engine TEXT NOT NULL,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (engine, query)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_serp_last_access ON serp_results (last_access)")
+        self._conn.commit()
+
+    def get(self, engine: str, query: str) -> Optional[List[Tuple[str, str]]]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM serp_results WHERE engine = ? AND query = ?", (engine, key)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM serp_results WHERE engine = ? AND query = ?", (engine, key))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE serp_results SET last_access = ? WHERE engine = ? AND query = ?", (now, engine, key))
+            self._conn.commit()
+        self.stats["hits"] += 1
+        return [tuple(pair) for pair in json.loads(row[0])]
+
+    def put(self, engine: str, query: str, results: List[Tuple[str, str]]):
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_results (engine, query, results, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (engine, key, json.dumps(results, ensure_ascii=False), now, now)
+            )
+            # Despejo LRU: remove os menos acessados quando passa do limite
+            overflow = self._conn.execute("SELECT COUNT(*) FROM serp_results").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM serp_results WHERE rowid IN (SELECT rowid FROM serp_results ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats["evictions"] += overflow
+            self._conn.commit()
+        self.stats["writes"] += 1
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,207 @@
+import asyncio
+import sys
+import threading
+import types
+from typing import Dict, List, Optional
+
+import dns.asyncresolver
+import dns.resolver
+
+import verifier
+
+# Dublês locais de SMTP e DNS para testar/medir o verificador sem tocar a rede.
+# Cada domínio falso aponta (via DNS stub) para um endereço de loopback próprio
+# (127.0.0.2, 127.0.0.3, ...), então o verificador enxerga um MX diferente por domínio.
+#
+#   async with StandInEnvironment({"ok.test": DomainProfile("normal", mailboxes={"joao"})}) as env:
+#       await verifier.verify_email_async("joao@ok.test")
+#
+# Comportamentos:
+#   normal  - 250 para as caixas em `mailboxes`, 550 para o resto
+#   accept  - catch-all: 250 para qualquer destinatário
+#   reject  - 550 para qualquer destinatário
+#   greylist- 450 na primeira tentativa de cada destinatário, depois igual ao normal
+#   slow    - igual ao normal, com `delay` segundos antes de cada resposta
+#   drop    - igual ao normal, mas derruba a conexão depois de `drop_after` RCPTs
+# `delay` vale para todos os comportamentos (latência de rede simulada).
+
+STAND_IN_PORT = 2525
+BEHAVIORS = ("normal", "accept", "reject", "greylist", "slow", "drop")
+GREYLIST_MESSAGE = b"450 4.7.1 Greylisted, try again in 300 seconds"
+
+
+class DomainProfile:
+    def __init__(self, behavior: str = "normal", mailboxes=None, delay: float = 0.0, drop_after: int = 5):
+        if behavior not in BEHAVIORS:
+            raise ValueError(f"Comportamento desconhecido: {behavior}")
+        self.behavior = behavior
+        self.mailboxes = set(mailboxes or ())
+        self.delay = delay if delay or behavior != "slow" else 0.2
+        self.drop_after = drop_after
+
+
+class StandInSMTPServer:
+    """Servidor SMTP configurável por domínio do destinatário. Escuta em um ou mais endereços locais."""
+    def __init__(self, profiles: Dict[str, DomainProfile], port: int = STAND_IN_PORT):
+        self.profiles = {domain.lower(): profile for domain, profile in profiles.items()}
+        self.port = port
+        self._servers: List[asyncio.AbstractServer] = []
+        self._greylisted = set()
+        self.stats = {"connections": 0, "rcpt": 0, "dropped": 0, "greylisted": 0}
+
+    async def start(self, hosts):
+        for host in dict.fromkeys(hosts):
+            self._servers.append(await asyncio.start_server(self._handle, host, self.port))
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+    def _reply_for(self, recipient: str) -> Optional[bytes]:
+        local, _, domain = recipient.partition("@")
+        profile = self.profiles.get(domain.lower())
+        if profile is None or profile.behavior == "reject":
+            return b"550 5.1.1 User unknown"
+        if profile.behavior == "accept":
+            return b"250 2.1.5 OK"
+        if profile.behavior == "greylist" and recipient not in self._greylisted:
+            self._greylisted.add(recipient)
+            self.stats["greylisted"] += 1
+            return GREYLIST_MESSAGE
+        return b"250 2.1.5 OK" if local.lower() in profile.mailboxes else b"550 5.1.1 User unknown"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        rcpts = 0
+
+        async def send(line: bytes, profile: Optional[DomainProfile] = None):
+            if profile is not None and profile.delay:
+                await asyncio.sleep(profile.delay)
+            writer.write(line + b"\r\n")
+            await writer.drain()
+
+        try:
+            await send(b"220 stand-in ESMTP")
+            profile = None
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("latin-1").strip()
+                verb = command[:4].upper()
+                if verb == "RCPT":
+                    recipient = command.partition(":")[2].strip().strip("<>")
+                    profile = self.profiles.get(recipient.partition("@")[2].lower(), profile)
+                    rcpts += 1
+                    self.stats["rcpt"] += 1
+                    if profile is not None and profile.behavior == "drop" and rcpts > profile.drop_after:
+                        self.stats["dropped"] += 1
+                        break
+                    await send(self._reply_for(recipient), profile)
+                elif verb == "QUIT":
+                    await send(b"221 Bye", profile)
+                    break
+                else:
+                    await send(b"250 OK", profile)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class _Exchange:
+    def __init__(self, host: str, preference: int):
+        self.exchange = host  # Sem ponto final, para o smtplib do verify_email_realtime aceitar o IP
+        self.preference = preference
+
+
+class _Answer(list):
+    def __init__(self, records, ttl: int):
+        super().__init__(records)
+        self.rrset = types.SimpleNamespace(ttl=ttl)
+
+
+class StubResolver:
+    """
+    Substitui dns.resolver.resolve (verificador antigo) e dns.asyncresolver.resolve (mx_cache)
+    por uma tabela em memória. Domínio fora da tabela = NXDOMAIN.
+    """
+    def __init__(self, mx_table: Dict[str, List[str]], ttl: int = 300, latency: float = 0.0):
+        self.mx_table = {domain.lower(): hosts for domain, hosts in mx_table.items()}
+        self.ttl = ttl
+        self.latency = latency
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._originals = None
+
+    def _answer(self, domain, rdtype):
+        with self._lock:
+            self.queries += 1
+        hosts = self.mx_table.get(str(domain).lower().rstrip("."))
+        if str(rdtype).upper() != "MX" or not hosts:
+            raise dns.resolver.NXDOMAIN()
+        return _Answer([_Exchange(host, 10 * (i + 1)) for i, host in enumerate(hosts)], self.ttl)
+
+    def resolve(self, domain, rdtype="A", *args, **kwargs):
+        if self.latency:
+            threading.Event().wait(self.latency)
+        return self._answer(domain, rdtype)
+
+    async def resolve_async(self, domain, rdtype="A", *args, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(domain, rdtype)
+
+    def install(self):
+        self._originals = (dns.resolver.resolve, dns.asyncresolver.resolve)
+        dns.resolver.resolve = self.resolve
+        dns.asyncresolver.resolve = self.resolve_async
+
+    def uninstall(self):
+        if self._originals is not None:
+            dns.resolver.resolve, dns.asyncresolver.resolve = self._originals
+            self._originals = None
+
+
+def reset_verifier_state():
+    """Zera caches e limitadores do verificador (cada rodada do benchmark começa do zero)."""
+    verifier.mx_cache.clear()
+    verifier.catchall_cache.clear()
+    verifier._mx_limiters.clear()
+    verifier._verify_semaphore = None
+
+
+class StandInEnvironment:
+    """
+    Sobe o SMTP local, instala o DNS stub e aponta o verificador para a porta local.
+    Tudo é desfeito na saída do `async with`.
+    """
+    def __init__(self, profiles: Dict[str, DomainProfile], port: int = STAND_IN_PORT, dns_latency: float = 0.0):
+        self.port = port
+        # Linux roteia todo 127.0.0.0/8 para o loopback; em outros sistemas fica tudo em 127.0.0.1
+        multi_host = sys.platform.startswith("linux")
+        self.mx_table = {
+            domain: [f"127.0.0.{i + 2}" if multi_host else "127.0.0.1"]
+            for i, domain in enumerate(profiles)
+        }
+        if len(self.mx_table) > 250:
+            raise ValueError("Máximo de 250 domínios falsos por ambiente")
+        self.server = StandInSMTPServer(profiles, port)
+        self.resolver = StubResolver(self.mx_table, latency=dns_latency)
+        self._previous_port = None
+
+    async def __aenter__(self):
+        await self.server.start(host for hosts in self.mx_table.values() for host in hosts)
+        self.resolver.install()
+        self._previous_port = verifier.SMTP_PORT
+        verifier.SMTP_PORT = self.port
+        reset_verifier_state()
+        return self
+
+    async def __aexit__(self, *exc):
+        verifier.SMTP_PORT = self._previous_port
+        self.resolver.uninstall()
+        reset_verifier_state()
+        await self.server.stop()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, List, Optional
+
+# Verificação preguiçosa: a varredura grava os leads como 'pending' e só enfileira os e-mails.
+# Os workers daqui verificam em lotes (uma sessão SMTP por MX) fora do caminho da varredura.
+# A fila é só de memória: o status 'pending' no banco é o que vale, e o startup recoloca
+# na fila os leads que ficaram pendentes (main.requeue_pending_leads).
+BACKLOG_BATCH_SIZE = int(os.getenv("BACKLOG_BATCH_SIZE", "50"))
+BACKLOG_WORKERS = int(os.getenv("BACKLOG_WORKERS", "2"))
+BACKLOG_BATCH_WINDOW = 1.0  # Espera um pouco para juntar e-mails que chegam em sequência no mesmo lote
+
+VerifyBatch = Callable[[List[str]], Awaitable[None]]
+
+
+class VerificationBacklog:
+    """
+    Fila de e-mails aguardando verificação SMTP. `submit()` não bloqueia; os workers
+    juntam até BACKLOG_BATCH_SIZE e-mails e chamam `verify_batch(emails)`, que verifica
+    e atualiza status/confiança dos leads. E-mails repetidos na fila são ignorados.
+    """
+    def __init__(self, verify_batch: VerifyBatch, batch_size: int = BACKLOG_BATCH_SIZE, workers: int = BACKLOG_WORKERS):
+        self.verify_batch = verify_batch
+        self.batch_size = batch_size
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = set()
+        self._runners: List[asyncio.Task] = []
+        self.stats = {"submitted": 0, "verified": 0, "batches": 0, "errors": 0}
+
+    async def start(self):
+        if not self._runners:
+            self._queue = asyncio.Queue()
+            for email in self._queued:
+                self._queue.put_nowait(email)
+            self._runners = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for runner in self._runners:
+            runner.cancel()
+        for runner in self._runners:
+            try:
+                await runner
+            except asyncio.CancelledError:
+                pass
+        self._runners = []
+
+    def pending(self) -> int:
+        return len(self._queued)
+
+    def submit(self, email: str):
+        if email in self._queued:
+            return
+        self._queued.add(email)
+        self.stats["submitted"] += 1
+        if self._queue is not None:
+            self._queue.put_nowait(email)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + BACKLOG_BATCH_WINDOW
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Sai do conjunto antes de verificar: um lead novo com o mesmo e-mail volta para a fila
+            self._queued.difference_update(batch)
+            self.stats["batches"] += 1
+            try:
+                await self.verify_batch(batch)
+                self.stats["verified"] += len(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"   ⚠️ [BACKLOG] Falha ao verificar lote: {e}")
@@ -0,0 +1,79 @@
+import datetime
+import os
+from typing import Dict, Iterable
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+import models
+from verifier import VerificationResult, verify_emails_detailed
+
+# Janela de validade de uma verificação gravada (outro usuário reaproveita sem tocar a rede)
+VERIFICATION_FRESHNESS_DAYS = int(os.getenv("VERIFICATION_FRESHNESS_DAYS", "14"))
+
+stats = {"hits": 0, "misses": 0, "writes": 0}
+
+
+def load_fresh(db: Session, emails: Iterable[str], freshness_days: int = VERIFICATION_FRESHNESS_DAYS) -> Dict[str, VerificationResult]:
+    """Busca numa única query (IN) as verificações ainda dentro da janela de validade."""
+    emails = list(dict.fromkeys(emails))
+    if not emails:
+        return {}
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=freshness_days)
+    rows = db.query(models.EmailVerification).filter(
+        models.EmailVerification.email.in_(emails),
+        models.EmailVerification.checked_at >= cutoff
+    ).all()
+    return {
+        row.email: VerificationResult(row.status, row.smtp_code, "", row.is_catch_all, row.mx_host)
+        for row in rows
+    }
+
+
+def store_results(db: Session, results: Dict[str, VerificationResult]):
+    """
+    Grava/atualiza as verificações num único INSERT ... ON DUPLICATE KEY UPDATE.
+    Só respostas SMTP definitivas (2xx/5xx do RCPT) viram veredito compartilhado: falha de DNS,
+    MX fora do ar, porta 25 bloqueada e greylisting dizem algo sobre a rede, não sobre a caixa.
+    """
+    now = datetime.datetime.utcnow()
+    rows = [
+        {"email": email, "status": r.status, "smtp_code": r.code, "is_catch_all": r.catch_all,
+         "mx_host": r.mx_host, "checked_at": now}
+        for email, r in results.items()
+        if r.is_definitive
+    ]
+    if not rows:
+        return
+    stmt = mysql_insert(models.EmailVerification).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+        status=stmt.inserted.status,
+        smtp_code=stmt.inserted.smtp_code,
+        is_catch_all=stmt.inserted.is_catch_all,
+        mx_host=stmt.inserted.mx_host,
+        checked_at=stmt.inserted.checked_at,
+    )
+    try:
+        db.execute(stmt)
+        db.commit()
+        stats["writes"] += len(rows)
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao gravar cache de verificação: {e}")
+
+
+async def verify_emails_cached(db: Session, emails, refresh: bool = False) -> Dict[str, VerificationResult]:
+    """
+    Verificação com cache compartilhado: lê a tabela email_verifications antes de ir à
+    rede e grava os resultados novos em lote. `refresh=True` ignora o cache.
+    """
+    emails = list(dict.fromkeys(emails))
+    cached = {} if refresh else load_fresh(db, emails)
+    missing = [email for email in emails if email not in cached]
+    stats["hits"] += len(cached)
+    stats["misses"] += len(missing)
+
+    fresh = await verify_emails_detailed(missing) if missing else {}
+    if fresh:
+        store_results(db, fresh)
+    return {email: cached.get(email) or fresh[email] for email in emails}
@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from verifier import VerificationResult, verify_emails_detailed
+
+# Retentativas para respostas temporárias (450/451 greylisting, 421/452 throttle)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "60"))      # 1 min, 2 min, 4 min...
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "1800"))
+GREYLIST_DEFAULT_DELAY = float(os.getenv("GREYLIST_DEFAULT_DELAY", "300"))
+RETRY_BATCH_WINDOW = 1.0  # Junta jobs que vencem juntos num mesmo lote (mesma sessão SMTP)
+
+GREYLIST_CODES = {450, 451}
+_DELAY_RE = re.compile(r"(\d+)\s*(s\b|sec|seg|second|segundo|m\b|min|minute|minuto)", re.IGNORECASE)
+_GREYLIST_RE = re.compile(r"grey|gray|try again later|tente novamente", re.IGNORECASE)
+
+OnFinal = Callable[[str, VerificationResult], Awaitable[None]]
+
+
+def retry_delay(result: VerificationResult, attempt: int) -> float:
+    """
+    Quanto esperar antes da próxima tentativa.
+    Greylisting costuma dizer o tempo ("try again in 300 seconds"); senão, backoff exponencial.
+    """
+    if result.code in GREYLIST_CODES and result.message:
+        match = _DELAY_RE.search(result.message)
+        if match:
+            value = int(match.group(1))
+            if match.group(2).lower().startswith("m"):
+                value *= 60
+            return min(RETRY_MAX_DELAY, max(value, 1))
+        if _GREYLIST_RE.search(result.message):
+            return GREYLIST_DEFAULT_DELAY
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+
+
+class _Job:
+    __slots__ = ("email", "attempts", "on_final")
+
+    def __init__(self, email: str, on_final: OnFinal, attempts: int = 1):
+        self.email = email
+        self.attempts = attempts
+        self.on_final = on_final
+
+
+class VerificationScheduler:
+    """
+    Fila de re-verificação para respostas temporárias do SMTP.
+    Cada e-mail volta para a fila com o atraso pedido pelo servidor (greylisting) ou com
+    backoff exponencial, até RETRY_MAX_ATTEMPTS. Quando a resposta fica definitiva (ou as
+    tentativas acabam), `on_final(email, resultado)` é chamado para gravar o status.
+    Os limites por host MX (sessões e token bucket) ficam no próprio verifier.
+    """
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self.stats = {"scheduled": 0, "retries": 0, "resolved": 0, "gave_up": 0}
+
+    async def start(self):
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        for task in list(self._inflight):
+            task.cancel()
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, email: str, result: VerificationResult, on_final: OnFinal, attempts: int = 1):
+        """Agenda a retentativa de um e-mail cuja primeira verificação deu falha temporária."""
+        self.stats["scheduled"] += 1
+        self._push(_Job(email, on_final, attempts), retry_delay(result, attempts))
+
+    def _push(self, job: _Job, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self._heap[0][0] - time.monotonic()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Tudo que vence agora (ou logo em seguida) vai no mesmo lote
+            due: Dict[str, _Job] = {}
+            horizon = time.monotonic() + RETRY_BATCH_WINDOW
+            while self._heap and self._heap[0][0] <= horizon:
+                _, _, job = heapq.heappop(self._heap)
+                due[job.email] = job
+            task = asyncio.create_task(self._retry(list(due.values())))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _retry(self, jobs: List[_Job]):
+        self.stats["retries"] += len(jobs)
+        try:
+            results = await verify_emails_detailed([job.email for job in jobs])
+        except Exception as e:
+            print(f"   ⚠️ [RETRY] Falha no lote de re-verificação: {e}")
+            results = {job.email: VerificationResult("risky") for job in jobs}
+
+        for job in jobs:
+            result = results[job.email]
+            if result.is_temp_fail and job.attempts < self.max_attempts:
+                job.attempts += 1
+                self._push(job, retry_delay(result, job.attempts))
+                continue
+            self.stats["resolved" if not result.is_temp_fail else "gave_up"] += 1
+            try:
+                await job.on_final(job.email, result)
+            except Exception as e:
+                print(f"   ⚠️ [RETRY] Erro ao gravar resultado de {job.email}: {e}")
@@ -1,17 +1,25 @@
 import smtplib
 import dns.resolver
-import re
 import socket
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from mx_cache import mx_cache
+from catchall_cache import catchall_cache
+from email_classifier import classify_email
 
 def verify_email_realtime(email: str):
     """
     Verifica se um e-mail é válido tecnicamente.
     Retorna: 'valid', 'invalid', ou 'risky'
     """
-    # 1. Sintaxe Básica
-    if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+    # 1. Classificação offline: sintaxe estrita, IDN, descartáveis e no-reply (sem rede)
+    classification = classify_email(email)
+    if classification.rejected:
         return "invalid"
 
+    email = classification.email
     domain = email.split('@')[1]
 
     # 2. Verifica DNS (MX Record)
@@ -27,7 +35,7 @@ def verify_email_realtime(email: str):
         server.set_debuglevel(0)
         
         # Tenta conectar
-        server.connect(mx_record, 25)
+        server.connect(mx_record, SMTP_PORT)
         server.helo('CheckMyEmail') 
         
         # --- CATCH-ALL DETECTOR ---
@@ -53,4 +61,303 @@ def verify_email_realtime(email: str):
             return "risky" 
 
     except Exception:
-        return "risky"
\ No newline at end of file
+        return "risky"
+
+# --- VERIFICADOR ASSÍNCRONO (não trava o event loop do uvicorn) ---
+SMTP_TIMEOUT = 3
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25")) # Só muda no harness local (smtp_stand_in.py)
+HELO_NAME = "CheckMyEmail"
+MAIL_FROM = "test@example.com"
+VERIFY_CONCURRENCY = int(os.getenv("VERIFY_CONCURRENCY", "20"))
+SMTP_MAX_RCPT_PER_SESSION = int(os.getenv("SMTP_MAX_RCPT_PER_SESSION", "25"))
+SMTP_MAX_RECONNECTS = 3
+SMTP_RECONNECT_CODES = {421, 452} # "closing channel" / "too many recipients"
+# Educação com cada servidor MX: sessões simultâneas e RCPTs por segundo (token bucket)
+MX_MAX_SESSIONS = int(os.getenv("MX_MAX_SESSIONS", "2"))
+MX_RCPT_RATE = float(os.getenv("MX_RCPT_RATE", "5"))
+MX_RCPT_BURST = int(os.getenv("MX_RCPT_BURST", "10"))
+MX_LIMITERS_MAX = 512           # Acima disso, limitadores ociosos são descartados
+MX_LIMITER_IDLE_SECONDS = 300   # Sem RCPT há esse tempo: balde cheio e nenhuma sessão aberta
+
+_verify_semaphore = None
+
+def _semaphore() -> asyncio.Semaphore:
+    global _verify_semaphore
+    if _verify_semaphore is None:
+        _verify_semaphore = asyncio.Semaphore(VERIFY_CONCURRENCY)
+    return _verify_semaphore
+
+class TokenBucket:
+    """Limita a taxa (tokens/s) permitindo rajadas de até `capacity`."""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class _MxLimiter:
+    def __init__(self):
+        self.sessions = asyncio.Semaphore(MX_MAX_SESSIONS)
+        self.bucket = TokenBucket(MX_RCPT_RATE, MX_RCPT_BURST)
+
+    def is_idle(self, now: float) -> bool:
+        return now - self.bucket.updated >= MX_LIMITER_IDLE_SECONDS
+
+_mx_limiters: Dict[str, _MxLimiter] = {}
+
+def _mx_limiter(host: str) -> _MxLimiter:
+    limiter = _mx_limiters.get(host)
+    if limiter is None:
+        if len(_mx_limiters) >= MX_LIMITERS_MAX:
+            # Um worker de longa duração fala com milhares de MX: só guarda os que estão em uso
+            now = time.monotonic()
+            for idle_host in [h for h, l in _mx_limiters.items() if l.is_idle(now)]:
+                del _mx_limiters[idle_host]
+        limiter = _mx_limiters[host] = _MxLimiter()
+    return limiter
+
+class VerificationResult(NamedTuple):
+    status: str                      # valid, invalid, risky
+    code: Optional[int] = None       # Último código SMTP do RCPT (None = não chegou a perguntar)
+    message: str = ""
+    catch_all: Optional[bool] = None
+    mx_host: Optional[str] = None
+
+    @property
+    def is_temp_fail(self) -> bool:
+        """450/451 (greylisting), 421/452 (throttle): vale tentar de novo mais tarde."""
+        return self.code is not None and 400 <= self.code < 500
+
+    @property
+    def is_definitive(self) -> bool:
+        """
+        O servidor respondeu 2xx/5xx ao RCPT deste endereço (sem resposta SMTP = nada a afirmar).
+        Um 2xx só é definitivo se o veredito de catch-all também saiu.
+        """
+        if self.code is None:
+            return False
+        if 200 <= self.code < 300:
+            return self.catch_all is not None
+        return self.code >= 500
+
+class SMTPProbeError(Exception):
+    pass
+
+class SmtpSession:
+    """Cliente SMTP mínimo sobre asyncio streams: só o necessário para HELO/MAIL/RCPT/RSET/QUIT."""
+    def __init__(self, host: str, port: Optional[int] = None, timeout: float = SMTP_TIMEOUT):
+        self.host = host
+        self.port = port or SMTP_PORT
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def _read_reply(self):
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise SMTPProbeError("Conexão encerrada pelo servidor")
+            line = line.decode("latin-1").rstrip("\r\n")
+            lines.append(line[4:])
+            if len(line) < 4 or line[3] != "-":
+                try:
+                    return int(line[:3]), "\n".join(lines)
+                except ValueError:
+                    raise SMTPProbeError(f"Resposta inválida: {line!r}")
+
+    async def command(self, line: str):
+        self.writer.write(f"{line}\r\n".encode("ascii", errors="ignore"))
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+        return await self._read_reply()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        code, _ = await self._read_reply()
+        if code != 220:
+            raise SMTPProbeError(f"Saudação inesperada: {code}")
+        code, _ = await self.command(f"HELO {HELO_NAME}")
+        if code != 250:
+            raise SMTPProbeError(f"HELO recusado: {code}")
+
+    async def mail(self, sender: str = MAIL_FROM):
+        return await self.command(f"MAIL FROM:<{sender}>")
+
+    async def rcpt(self, recipient: str):
+        return await self.command(f"RCPT TO:<{recipient}>")
+
+    async def rset(self):
+        return await self.command("RSET")
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            await self.command("QUIT")
+        except Exception:
+            pass
+        try:
+            self.writer.close()
+            await asyncio.wait_for(self.writer.wait_closed(), self.timeout)
+        except Exception:
+            pass
+        self.writer = None
+
+async def _probe_catch_all(session: SmtpSession, domain: str) -> int:
+    """Ping com e-mail garantidamente falso para ver se o servidor aceita tudo. Deixa a sessão resetada."""
+    await session.mail()
+    catchall_code, _ = await session.rcpt(f"xjzqw91823_pingtest@{domain}")
+    await session.rset() # Reseta correio
+    return catchall_code
+
+async def _connect_first_available(mx_hosts, max_hosts: int = 2):
+    """Conecta no MX preferido; se ele não responder, tenta o próximo da lista."""
+    for host in mx_hosts[:max_hosts]:
+        session = SmtpSession(host)
+        try:
+            await session.connect()
+            return session
+        except Exception:
+            await session.close()
+    return None
+
+def _status_from_code(code: int, is_catch_all: Optional[bool]) -> str:
+    if code == 250:
+        # Catch-all (ou não deu para saber): o "OK" não garante que a pessoa exista
+        return "valid" if is_catch_all is False else "risky"
+    elif code == 550:
+        return "invalid"
+    return "risky"
+
+async def _verify_on_mx(mx_hosts, items, emit, refresh_domains):
+    """
+    Verifica todos os (domínio, e-mail, endereço normalizado) que compartilham o mesmo MX numa única sessão SMTP:
+    RSET + MAIL + RCPT por destinatário. Reconecta quando o servidor derruba a conexão
+    ou atinge o limite de destinatários por sessão (e passa a respeitar esse limite).
+    Respeita o limite de sessões e a taxa de RCPT por host MX.
+    """
+    limiter = _mx_limiter(mx_hosts[0])
+    pending = list(items)
+    max_rcpt = SMTP_MAX_RCPT_PER_SESSION
+    failures = 0 # Sessões seguidas sem nenhum progresso
+    last_code, last_message = None, ""
+    while pending and failures <= SMTP_MAX_RECONNECTS:
+        sent = 0
+        async with _semaphore(), limiter.sessions:
+            session = await _connect_first_available(mx_hosts)
+            if session is None:
+                break
+            try:
+                while pending and sent < max_rcpt:
+                    domain, email, address = pending[0]
+                    await limiter.bucket.acquire()
+
+                    # --- CATCH-ALL DETECTOR (1 probe por domínio por dia, via cache) ---
+                    force = domain in refresh_domains
+                    is_catch_all = await catchall_cache.resolve(domain, lambda: _probe_catch_all(session, domain),
+                                                                force_refresh=force)
+                    refresh_domains.discard(domain)
+
+                    # --- TESTE REAL DO E-MAIL ALVO ---
+                    await session.rset() # Reseta correio
+                    await session.mail()
+                    code, message = await session.rcpt(address)
+                    last_code, last_message = code, message
+                    if code in SMTP_RECONNECT_CODES:
+                        # Servidor pediu para sair / excesso de destinatários: nova sessão
+                        if code == 452 and sent > 0:
+                            max_rcpt = sent
+                        break
+                    await emit(email, VerificationResult(_status_from_code(code, is_catch_all), code, message,
+                                                         is_catch_all, session.host))
+                    pending.pop(0)
+                    sent += 1
+            except Exception:
+                pass # Conexão caiu: reconecta e continua de onde parou
+            finally:
+                await session.close()
+        failures = 0 if sent else failures + 1
+
+    # Quem sobrou (MX fora do ar ou derrubando sempre) fica como 'risky', igual ao verificador antigo
+    # O código só vale para eles se foi o 421/452 que interrompeu a sessão; outro é de um destinatário anterior
+    code = last_code if last_code in SMTP_RECONNECT_CODES else None
+    for _domain, email, _address in pending:
+        await emit(email, VerificationResult("risky", code, last_message, None, mx_hosts[0]))
+
+OnResult = Callable[[str, VerificationResult], Awaitable[None]]
+
+async def verify_emails_detailed(emails, refresh_catch_all: bool = False,
+                                 on_result: Optional[OnResult] = None) -> Dict[str, VerificationResult]:
+    """
+    Verifica uma lista de e-mails reaproveitando conexões: agrupa por host MX e abre
+    uma sessão SMTP por host (em vez de um handshake completo por e-mail).
+    Retorna {email: VerificationResult} com o código SMTP, para quem precisa decidir retentativas.
+    `on_result(email, resultado)` é aguardado assim que cada resultado fica pronto
+    (se o consumidor for lento, a verificação espera: backpressure).
+    """
+    results: Dict[str, VerificationResult] = {}
+
+    async def emit(email: str, result: VerificationResult):
+        results[email] = result
+        if on_result is not None:
+            await on_result(email, result)
+
+    by_domain: Dict[str, List[str]] = {}
+    addresses: Dict[str, str] = {}
+    for email in dict.fromkeys(emails):
+        # 1. Classificação offline: sintaxe estrita, IDN, descartáveis e no-reply (sem rede)
+        classification = classify_email(email)
+        if classification.rejected:
+            await emit(email, VerificationResult("invalid", message=classification.reason))
+            continue
+        addresses[email] = classification.email # O que vai no RCPT (domínio em punycode)
+        by_domain.setdefault(classification.email.split('@')[1], []).append(email)
+
+    # 2. Verifica DNS (MX Record) — cacheado por TTL e compartilhado entre varreduras
+    domains = list(by_domain)
+    lookups = await asyncio.gather(*(mx_cache.resolve(d) for d in domains), return_exceptions=True)
+
+    by_mx: Dict[str, Dict] = {}
+    for domain, mx_hosts in zip(domains, lookups):
+        if isinstance(mx_hosts, BaseException):
+            # DNS não respondeu: não dá para afirmar nada sobre o domínio
+            for email in by_domain[domain]:
+                await emit(email, VerificationResult("risky", message=f"Falha de DNS: {mx_hosts}"))
+            continue
+        if not mx_hosts:
+            for email in by_domain[domain]:
+                await emit(email, VerificationResult("invalid")) # Domínio não tem e-mail configurado
+            continue
+        group = by_mx.setdefault(mx_hosts[0], {"hosts": mx_hosts, "items": []})
+        group["items"].extend((domain, email, addresses[email]) for email in by_domain[domain])
+
+    # 3. Simulação de SMTP: uma sessão por MX, hosts diferentes em paralelo
+    refresh_domains = set(domains) if refresh_catch_all else set()
+    await asyncio.gather(*(_verify_on_mx(g["hosts"], g["items"], emit, refresh_domains) for g in by_mx.values()))
+    return {email: results[email] for email in emails}
+
+async def verify_emails_batch(emails, refresh_catch_all: bool = False) -> Dict[str, str]:
+    """Como verify_emails_detailed, mas retorna só {email: 'valid' | 'invalid' | 'risky'}."""
+    detailed = await verify_emails_detailed(emails, refresh_catch_all=refresh_catch_all)
+    return {email: result.status for email, result in detailed.items()}
+
+async def verify_email_async(email: str, refresh_catch_all: bool = False) -> str:
+    """
+    Versão assíncrona de verify_email_realtime (mesmos resultados: 'valid', 'invalid', 'risky').
+    DNS e SMTP não bloqueiam o event loop; o semáforo global limita as conexões simultâneas.
+    O veredito de catch-all vem do cache por domínio; `refresh_catch_all` força um novo probe.
+    """
+    results = await verify_emails_batch([email], refresh_catch_all=refresh_catch_all)
+    return results[email]
@@ -25,7 +25,131 @@ document.addEventListener('DOMContentLoaded', async () => {
         document.head.appendChild(link);
     }
 
-    // Função para buscar e desenhar os leads
+    let leads = [];       // Leads já conhecidos (a lista é mantida pelo stream, sem refazer GET)
+    let eventSource = null;
+    let streamFailed = false; // Stream recusado (ex.: erro no servidor): não tenta de novo a cada leitura
+
+    // Desenha os leads em memória
+    function renderLeads(isScanning) {
+        list.innerHTML = '';
+        const emptyBox = document.getElementById('empty-state-box');
+
+        if (leads.length > 0) {
+            statusArea.style.display = 'none';
+            emptyBox.style.display = 'none'; // Esconde caixa azul
+
+            // Mostra "Ver mais" se tiver leads
+            btnSeeMore.style.display = 'block';
+
+            // Renderiza APENAS os 5 primeiros no popup para não poluir
+            leads.slice(0, 5).forEach(lead => list.appendChild(leadItem(lead)));
+        } else if (isScanning === false) {
+            // Se 0 leads MAS já terminou de escanear (is_scanning === false), mostra erro real
+            statusArea.style.display = 'none';
+            emptyBox.style.display = 'block';
+            btnSeeMore.style.display = 'none';
+        } else {
+            // Está escaneando e ainda não achou:
+            // Garante que a caixa de vazio fique escondida enquanto busca
+            statusArea.style.display = 'none';
+            emptyBox.style.display = 'none';
+        }
+    }
+
+    function finishScan() {
+        btnScan.disabled = false;
+        btnScan.innerHTML = `<i class="fas fa-search"></i> Buscar Novamente`;
+        loading.style.display = 'none';
+    }
+
+    // Progresso da varredura por Server-Sent Events (substitui o polling de /api/results)
+    function followScan() {
+        if (eventSource) eventSource.close();
+        eventSource = new EventSource(`http://127.0.0.1:8000/api/scan/${domain}/events`, { withCredentials: true });
+
+        eventSource.addEventListener('snapshot', e => {
+            const data = JSON.parse(e.data);
+            leads = data.leads;
+            renderLeads(data.is_scanning);
+        });
+        eventSource.addEventListener('lead', e => {
+            const lead = JSON.parse(e.data);
+            if (!leads.some(l => l.id === lead.id)) leads.push(lead);
+            renderLeads(true);
+        });
+        eventSource.addEventListener('verification', e => {
+            const data = JSON.parse(e.data);
+            if (data.removed) {
+                leads = leads.filter(l => l.id !== data.id);
+            } else {
+                leads = leads.map(l => l.id === data.id ? { ...l, ...data } : l);
+            }
+            renderLeads(true);
+        });
+        eventSource.addEventListener('phase', e => {
+            const phase = JSON.parse(e.data).phase;
+            const labels = { site: 'Lendo o site...', bing: 'Buscando no Bing...', google: 'Buscando no Google...', done: 'Verificando e-mails...' };
+            if (labels[phase]) btnScan.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${labels[phase]}`;
+        });
+        eventSource.addEventListener('done', () => {
+            eventSource.close(); // Senão o EventSource reconecta sozinho
+            eventSource = null;
+            renderLeads(false);
+            finishScan();
+        });
+        eventSource.onerror = () => {
+            // Sessão expirada / servidor fora: cai para uma leitura única
+            if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+                eventSource = null;
+                streamFailed = true;
+                finishScan();
+                loadLeads();
+            }
+        };
+    }
+
+    // Monta o item da lista de um lead
+    function leadItem(lead) {
+        const li = document.createElement('li');
+        li.className = 'lead-item';
+
+        // Define cor e ícone do status
+        let iconColor = lead.status === 'valid' ? '#16a34a' : '#ca8a04';
+        let bgBadge = lead.status === 'valid' ? '#dcfce7' : '#fef9c3';
+        let iconHtml = lead.status === 'valid' ? '<i class="fas fa-check-circle"></i>' : '<i class="fas fa-exclamation-circle"></i>';
+        if (lead.status === 'pending') { // Ainda na fila de verificação SMTP
+            iconColor = '#64748b';
+            bgBadge = '#f1f5f9';
+            iconHtml = '<i class="fas fa-clock"></i>';
+        }
+
+        // Botão do LinkedIn
+        let linkedinBtn = lead.linkedin_url
+            ? `<a href="${lead.linkedin_url}" target="_blank" title="Abrir LinkedIn" style="color:#0077b5; margin-left:8px; font-size:14px; text-decoration:none;"><i class="fab fa-linkedin"></i></a>`
+            : '';
+
+        // Formata o nome completo
+        let fullName = `${lead.first_name} ${lead.last_name || ''}`.trim();
+
+        li.innerHTML = `
+            <div style="display:flex; flex-direction:column; max-width: 65%;">
+                <div style="display:flex; align-items:center;">
+                    <span class="lead-email" style="font-weight:600; color:#334155;">${lead.email}</span>
+                    ${linkedinBtn}
+                </div>
+                <span style="font-size:11px; color:#64748b; margin-top:2px;">
+                    <i class="fas fa-user-tie" style="font-size:10px; margin-right:3px;"></i> ${fullName}
+                    <span style="color:#94a3b8;"> • ${lead.job_title || 'Contato'}</span>
+                </span>
+            </div>
+            <span class="lead-status" style="background:${bgBadge}; color:${iconColor}; font-size:10px; padding:2px 8px; border-radius:12px; display:flex; align-items:center; gap:4px; height:fit-content;">
+                ${iconHtml} ${lead.status}
+            </span>
+        `;
+        return li;
+    }
+
+    // Função para buscar e desenhar os leads (uma vez, ao abrir o popup)
     async function loadLeads() {
         try {
             const response = await fetch(`http://127.0.0.1:8000/api/results/${domain}`, { credentials: "include" });
@@ -41,70 +165,23 @@ document.addEventListener('DOMContentLoaded', async () => {
 
             const data = await response.json();
 
-            list.innerHTML = '';
-            const emptyBox = document.getElementById('empty-state-box');
-
             if (data.status === "Não iniciado") {
+                list.innerHTML = '';
                 statusArea.style.display = 'block';
-                emptyBox.style.display = 'none';
+                document.getElementById('empty-state-box').style.display = 'none';
                 btnSeeMore.style.display = 'none';
                 return; // Para a execução aqui
             }
 
-            if (data.leads && data.leads.length > 0) {
-                statusArea.style.display = 'none';
-                emptyBox.style.display = 'none'; // Esconde caixa azul
-
-                // Mostra "Ver mais" se tiver leads
-                btnSeeMore.style.display = 'block';
-
-                // Renderiza APENAS os 5 primeiros no popup para não poluir
-                data.leads.slice(0, 5).forEach(lead => {
-                    const li = document.createElement('li');
-                    li.className = 'lead-item';
-
-                    // Define cor e ícone do status
-                    let iconColor = lead.status === 'valid' ? '#16a34a' : '#ca8a04';
-                    let bgBadge = lead.status === 'valid' ? '#dcfce7' : '#fef9c3';
-                    let iconHtml = lead.status === 'valid' ? '<i class="fas fa-check-circle"></i>' : '<i class="fas fa-exclamation-circle"></i>';
-
-                    // Botão do LinkedIn
-                    let linkedinBtn = lead.linkedin_url
-                        ? `<a href="${lead.linkedin_url}" target="_blank" title="Abrir LinkedIn" style="color:#0077b5; margin-left:8px; font-size:14px; text-decoration:none;"><i class="fab fa-linkedin"></i></a>`
-                        : '';
-
-                    // Formata o nome completo
-                    let fullName = `${lead.first_name} ${lead.last_name || ''}`.trim();
-
-                    li.innerHTML = `
-                        <div style="display:flex; flex-direction:column; max-width: 65%;">
-                            <div style="display:flex; align-items:center;">
-                                <span class="lead-email" style="font-weight:600; color:#334155;">${lead.email}</span>
-                                ${linkedinBtn}
-                            </div>
-                            <span style="font-size:11px; color:#64748b; margin-top:2px;">
-                                <i class="fas fa-user-tie" style="font-size:10px; margin-right:3px;"></i> ${fullName}
-                                <span style="color:#94a3b8;"> • ${lead.job_title || 'Contato'}</span>
-                            </span>
-                        </div>
-                        <span class="lead-status" style="background:${bgBadge}; color:${iconColor}; font-size:10px; padding:2px 8px; border-radius:12px; display:flex; align-items:center; gap:4px; height:fit-content;">
-                            ${iconHtml} ${lead.status}
-                        </span>
-                    `;
-                    list.appendChild(li);
-                });
-            } else {
-                // Se 0 leads MAS já terminou de escanear (is_scanning === false), mostra erro real
-                if (data.is_scanning === false) {
-                    statusArea.style.display = 'none';
-                    emptyBox.style.display = 'block';
-                    btnSeeMore.style.display = 'none';
-                } else {
-                    // Está escaneando e ainda não achou (polling): 
-                    // Garante que a caixa de vazio fique escondida enquanto busca
-                    statusArea.style.display = 'none';
-                    emptyBox.style.display = 'none';
-                }
+            leads = data.leads || [];
+            renderLeads(data.is_scanning);
+
+            // Varredura ainda rodando (popup reaberto no meio): acompanha pelo stream
+            if (data.is_scanning && !eventSource && !streamFailed) {
+                btnScan.disabled = true;
+                btnScan.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Buscando...`;
+                loading.style.display = 'block';
+                followScan();
             }
         } catch (error) {
             console.error("Erro:", error);
@@ -138,25 +215,9 @@ document.addEventListener('DOMContentLoaded', async () => {
                 body: JSON.stringify({ domain: domain })
             });
 
-            // Polling: Verifica resultados a cada 2s
-            let attempts = 0;
-            const maxAttempts = 30; // 60 segundos limite
-
-            const interval = setInterval(async () => {
-                attempts++;
-                await loadLeads();
-
-                // Se já achou leads reais (que não sejam só os genéricos) ou estourou tempo
-                // Assumindo que genéricos são ~5, se tiver > 5 provavelmente achou algo
-                if (list.children.length > 0 || attempts >= maxAttempts) {
-                    if (attempts >= maxAttempts || list.children.length > 5) {
-                        clearInterval(interval);
-                        btnScan.disabled = false;
-                        btnScan.innerHTML = `<i class="fas fa-search"></i> Buscar Novamente`;
-                        loading.style.display = 'none';
-                    }
-                }
-            }, 2000);
+            // Leads, fases e verificações chegam por SSE conforme acontecem
+            leads = [];
+            followScan();
 
         } catch (error) {
             alert("Erro: O servidor Python está rodando?");